@@ -0,0 +1,176 @@
+"""Бенчмарк конкурентных чтений и записей в SQLite.
+
+Читатели открывают страницы постов, писатели одновременно добавляют
+комментарии — каждый в своём процессе, через django.test.Client, как
+в benchmarks/run.py. Прогон повторяется для профилей SQLite
+(BENCH_SQLITE_PROFILE в benchmarks/settings.py) на свежих копиях одной
+базы; в JSON пишутся операции в секунду, p95 и число ошибок
+«database is locked» для читателей и писателей.
+
+    python benchmarks/concurrency.py --readers 4 --writers 2 --duration 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROFILES = ('default', 'tuned')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments-per-post', type=float, default=3)
+    parser.add_argument('--posts-per-user', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Длительность прогона профиля, секунд.')
+    parser.add_argument('--profiles', nargs='*', choices=PROFILES,
+                        default=list(PROFILES))
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+    args.with_search = False
+    args.rebuild = False
+    return args
+
+
+def prepare_dataset(args):
+    """База с данными из benchmarks/run.py (кешируется там же)."""
+    sys.path.insert(0, str(ROOT))
+    from benchmarks import run
+    db_path = run.setup_django(args)
+    run.generate(args)
+    from django.db import connections
+    connections.close_all()
+    return db_path
+
+
+def copy_database(source, target, profile):
+    # Копия через backup API целостна, даже если рядом лежит -wal.
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        # Режим журнала хранится в файле: профиль default должен
+        # начинать со стандартного журнала отката.
+        dst.execute('PRAGMA journal_mode = '
+                    + ('DELETE' if profile == 'default' else 'WAL'))
+    finally:
+        src.close()
+        dst.close()
+
+
+def worker(role, profile, db_path, start_at, duration, seed, results):
+    os.environ['BENCH_DB'] = str(db_path)
+    os.environ['BENCH_SQLITE_PROFILE'] = profile
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    sys.path[:0] = [str(ROOT / 'blogicum'), str(ROOT)]
+    import django
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError
+    from django.test import Client
+
+    from blog.models import Post
+
+    rng = random.Random(seed)
+    user = get_user_model().objects.order_by('?').first()
+    client = Client()
+    client.force_login(user)
+    post_ids = list(Post.published.values_list('pk', flat=True)[:1000])
+
+    timings, errors = [], 0
+    time.sleep(max(0, start_at - time.time()))
+    while time.time() < start_at + duration:
+        pk = rng.choice(post_ids)
+        started = time.perf_counter()
+        try:
+            if role == 'reader':
+                response = client.get(f'/posts/{pk}/')
+            else:
+                response = client.post(
+                    f'/posts/{pk}/comment/',
+                    {'text': 'Комментарий из бенчмарка'})
+        except OperationalError:
+            errors += 1
+            continue
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+    results.put((role, timings, errors))
+
+
+def summarize(samples, duration):
+    timings = [value for values, _ in samples for value in values]
+    summary = {
+        'ops_per_second': round(len(timings) / duration, 1),
+        'errors': sum(errors for _, errors in samples),
+    }
+    if len(timings) >= 2:
+        summary['p50_ms'] = round(statistics.median(timings), 3)
+        summary['p95_ms'] = round(statistics.quantiles(
+            timings, n=100, method='inclusive')[94], 3)
+    return summary
+
+
+def run_profile(args, profile, source):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / 'bench.sqlite3'
+        copy_database(source, db_path, profile)
+        roles = ['reader'] * args.readers + ['writer'] * args.writers
+        # Запас на запуск Django в дочерних процессах.
+        start_at = time.time() + 5
+        processes = [
+            context.Process(target=worker, args=(
+                role, profile, db_path, start_at, args.duration,
+                args.seed + number, results))
+            for number, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        samples = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    return {
+        role: summarize([
+            (timings, errors) for sample_role, timings, errors in samples
+            if sample_role == role
+        ], args.duration)
+        for role in ('reader', 'writer')
+    }
+
+
+def main():
+    args = parse_args()
+    source = prepare_dataset(args)
+    report = {
+        'dataset': {'posts': args.posts, 'seed': args.seed},
+        'readers': args.readers,
+        'writers': args.writers,
+        'duration': args.duration,
+        'results': {},
+    }
+    for profile in args.profiles:
+        report['results'][profile] = run_profile(args, profile, source)
+        print(f'{profile}: {report["results"][profile]}', file=sys.stderr)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""Бенчмарк горячих страниц блога на синтетических данных.
+
+Генерирует пользователей, категории, места, посты и комментарии фабриками
+mixer (как в tests/fixtures), прогоняет страницы через django.test.Client
+и пишет в JSON p50/p95 задержки и число SQL-запросов на запрос.
+
+    python benchmarks/run.py --posts 10000 --output baseline.json
+    python benchmarks/run.py --posts 10000 --compare baseline.json
+
+База с данными кешируется в benchmarks/data/ по параметрам генерации,
+поэтому повторные запуски на разных коммитах меряют одни и те же данные.
+Сценарии выполняются на временной копии этой базы: пишущие (например,
+comment_create) не меняют кешированный набор.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / 'benchmarks' / 'data'
+BATCH_SIZE = 2000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments-per-post', type=float, default=3)
+    parser.add_argument('--posts-per-user', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--with-search', action='store_true',
+                        help='Заполнить поисковый индекс и мерить /search/.')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Пересоздать базу с данными.')
+    parser.add_argument('--only', nargs='*', help='Запустить только эти '
+                        'сценарии.')
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path,
+                        help='JSON прошлого запуска для сравнения.')
+    return parser.parse_args()
+
+
+def setup_django(args):
+    DATA_DIR.mkdir(exist_ok=True)
+    name = (f'bench-p{args.posts}-c{args.comments_per_post:g}'
+            f'-u{args.posts_per_user}-s{args.seed}'
+            f'{"-search" if args.with_search else ""}.sqlite3')
+    db_path = DATA_DIR / name
+    if args.rebuild and db_path.exists():
+        db_path.unlink()
+    os.environ['BENCH_DB'] = str(db_path)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    sys.path[:0] = [str(ROOT / 'blogicum'), str(ROOT)]
+    import django
+    django.setup()
+    return db_path
+
+
+def bulk_blend(mixer, model, count, **values):
+    created = 0
+    while created < count:
+        size = min(BATCH_SIZE, count - created)
+        model.objects.bulk_create(
+            [mixer.blend(model, **values) for _ in range(size)])
+        created += size
+
+
+def generate(args):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.utils import timezone
+    from mixer.backend.django import Mixer
+
+    from blog.models import Category, Comment, Location, Post
+
+    User = get_user_model()
+    call_command('migrate', verbosity=0)
+    if Post.objects.exists():
+        return
+    rng = random.Random(args.seed)
+    mixer = Mixer(commit=False)
+    started = time.perf_counter()
+
+    n_users = max(10, args.posts // args.posts_per_user)
+    bulk_blend(mixer, User, n_users,
+               username=mixer.sequence('bench_user_{0}'))
+    bulk_blend(mixer, Category, 10, is_published=True,
+               slug=mixer.sequence('bench-category-{0}'))
+    bulk_blend(mixer, Location, 20, is_published=True)
+    users = list(User.objects.only('pk'))
+    categories = list(Category.objects.only('pk'))
+    locations = list(Location.objects.only('pk'))
+
+    now = timezone.now()
+    posts = []
+    for number in range(args.posts):
+        # Около 2% постов — отложенные публикации.
+        offset = timedelta(minutes=rng.randint(-3 * 365 * 24 * 60, 0))
+        if rng.random() < 0.02:
+            offset = timedelta(days=rng.randint(1, 30))
+        pub_date = now + offset
+        posts.append(mixer.blend(
+            Post, author=rng.choice(users), category=rng.choice(categories),
+            location=rng.choice(locations), pub_date=pub_date, image='',
+            image_status='',
+            is_published=rng.random() > 0.01, is_visible=pub_date <= now,
+        ))
+        if len(posts) == BATCH_SIZE or number == args.posts - 1:
+            Post.objects.bulk_create(posts)
+            posts = []
+
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    n_comments = int(args.posts * args.comments_per_post)
+    comments = []
+    for number in range(n_comments):
+        comments.append(mixer.blend(
+            Comment, post=Post(pk=rng.choice(post_ids)),
+            author=rng.choice(users)))
+        if len(comments) == BATCH_SIZE or number == n_comments - 1:
+            Comment.objects.bulk_create(comments)
+            comments = []
+
+    call_command('recount_comments', stdout=open(os.devnull, 'w'))
+    call_command('rebuild_author_stats', stdout=open(os.devnull, 'w'))
+    if args.with_search:
+        call_command('rebuild_search_index', stdout=open(os.devnull, 'w'))
+    print(f'Данные сгенерированы за {time.perf_counter() - started:.1f} с: '
+          f'{n_users} пользователей, {args.posts} постов, '
+          f'{n_comments} комментариев', file=sys.stderr)
+
+
+@contextmanager
+def working_copy(db_path):
+    """Переключает default на копию базы с данными на время прогона."""
+    from django.db import connection, connections
+
+    from blogicum.sqlite_backend.pool import close_pools
+
+    connections.close_all()
+    with tempfile.TemporaryDirectory(dir=DATA_DIR) as directory:
+        copy = Path(directory) / db_path.name
+        # Копия через backup API целостна, даже если рядом лежит -wal.
+        source, target = sqlite3.connect(db_path), sqlite3.connect(copy)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        connection.settings_dict['NAME'] = str(copy)
+        try:
+            yield copy
+        finally:
+            connections.close_all()
+            # close() возвращает соединения в пул бэкенда, закрываем и их.
+            close_pools()
+            connection.settings_dict['NAME'] = str(db_path)
+
+
+def build_scenarios(args):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from blog.models import Category, Post
+    from blog.paginators import encode_cursor
+    from blogicum.settings import COUNT_PER_PAGE
+
+    rng = random.Random(args.seed)
+    reader = get_user_model().objects.order_by('pk').first()
+    client = Client()
+    client.force_login(reader)
+    anonymous = Client()
+
+    feed = Post.published.order_by('-pub_date', '-id')
+    total = feed.count()
+    deep_page = max(1, total // COUNT_PER_PAGE // 2)
+    deep_post = feed[(deep_page - 1) * COUNT_PER_PAGE]
+    deep_cursor = encode_cursor([deep_post.pub_date, deep_post.id])
+    post_ids = list(feed.values_list('pk', flat=True)[:1000])
+    slugs = list(Category.objects.values_list('slug', flat=True))
+    authors = list(feed.values_list('author__username', flat=True)[:1000])
+
+    scenarios = {
+        'index': lambda: (client, 'get', '/', {}),
+        'index_anonymous': lambda: (anonymous, 'get', '/', {}),
+        'index_deep_offset': lambda: (
+            client, 'get', '/', {'page': deep_page}),
+        'index_deep_cursor': lambda: (
+            client, 'get', '/', {'after': deep_cursor}),
+        'category': lambda: (
+            client, 'get', f'/category/{rng.choice(slugs)}/', {}),
+        'profile': lambda: (
+            client, 'get', f'/profile/{rng.choice(authors)}/', {}),
+        'detail': lambda: (
+            client, 'get', f'/posts/{rng.choice(post_ids)}/', {}),
+        'comment_create': lambda: (
+            client, 'post', f'/posts/{rng.choice(post_ids)}/comment/',
+            {'text': 'Комментарий из бенчмарка'}),
+    }
+    if args.with_search:
+        scenarios['search'] = lambda: (
+            client, 'get', '/search/', {'q': rng.choice(['дом', 'день'])})
+    if args.only:
+        scenarios = {name: scenarios[name] for name in args.only}
+    return scenarios
+
+
+def measure(scenario, iterations, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries = [], []
+    for number in range(warmup + iterations):
+        client, method, url, data = scenario()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url}: HTTP {response.status_code}')
+        if number >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(context.captured_queries))
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentiles[94], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline_path):
+    baseline = json.loads(baseline_path.read_text())
+    if baseline['dataset'] != report['dataset']:
+        print('Внимание: наборы данных отличаются, сравнение неточное.',
+              file=sys.stderr)
+    print(f'{"сценарий":<20} {"p50, мс":>22} {"p95, мс":>22} '
+          f'{"запросов":>12}')
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+
+        def delta(key):
+            change = (result[key] / before[key] - 1) * 100 if before[
+                key] else 0
+            return f'{before[key]:.1f} → {result[key]:.1f} ({change:+.0f}%)'
+
+        print(f'{name:<20} {delta("p50_ms"):>22} {delta("p95_ms"):>22} '
+              f'{before["queries_per_request"]:>5} → '
+              f'{result["queries_per_request"]}')
+
+
+def main():
+    args = parse_args()
+    db_path = setup_django(args)
+    generate(args)
+    import django
+
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': {
+            'posts': args.posts,
+            'comments_per_post': args.comments_per_post,
+            'posts_per_user': args.posts_per_user,
+            'seed': args.seed,
+            'with_search': args.with_search,
+        },
+        'iterations': args.iterations,
+        'results': {},
+    }
+    with working_copy(db_path):
+        for name, scenario in build_scenarios(args).items():
+            report['results'][name] = measure(
+                scenario, args.iterations, args.warmup)
+            print(f'{name}: {report["results"][name]}', file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import os
+from pathlib import Path
+
+from blogicum.settings import *  # noqa: F401,F403
+from blogicum.settings import SQLITE_OPTIONS
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['testserver']
+
+# BENCH_SQLITE_PROFILE=default — стандартный бэкенд Django без настроек,
+# tuned — профиль SQLITE_OPTIONS из настроек проекта.
+if os.environ.get('BENCH_SQLITE_PROFILE', 'tuned') == 'default':
+    engine = {'ENGINE': 'django.db.backends.sqlite3'}
+else:
+    engine = {
+        'ENGINE': 'blogicum.sqlite_backend', 'OPTIONS': SQLITE_OPTIONS}
+
+DATABASES = {
+    'default': {
+        **engine,
+        'NAME': os.environ.get(
+            'BENCH_DB',
+            Path(__file__).resolve().parent / 'data' / 'bench.sqlite3'),
+    }
+}
@@ -1,23 +1,66 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from blog import exports, search
 from blog.models import Category, Location, Post, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
-    search_fields = ('title', 'location__name', 'category__title',
-                     'author__username', 'pub_date', 'text',)
+class IndexedSearchMixin:
+    """Поиск по тексту идёт через поисковый индекс, а search_fields
+    остаются только для коротких полей связанных моделей.
+    """
 
+    search_kind = None
 
-class CategoryAdmin(admin.ModelAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        if search_term:
+            ids = search.search_ids(search_term, kind=self.search_kind)
+            results |= queryset.filter(pk__in=ids)
+        return results, use_distinct
+
+
+class ExportActionsMixin:
+    """Выгрузка выбранных строк файлом, без загрузки их в память."""
+
+    actions = ('export_jsonl', 'export_csv')
+
+    def export(self, queryset, fmt):
+        response = StreamingHttpResponse(
+            exports.RENDERERS[fmt](queryset),
+            content_type=exports.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{queryset.model._meta.model_name}.{fmt}"')
+        return response
+
+    @admin.action(description='Выгрузить в JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, 'jsonl')
+
+    @admin.action(description='Выгрузить в CSV')
+    def export_csv(self, request, queryset):
+        return self.export(queryset, 'csv')
+
+
+class PostAdmin(ExportActionsMixin, IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = search.POST
+    search_fields = ('location__name', 'category__title',
+                     'author__username',)
+
+
+class CategoryAdmin(ExportActionsMixin, admin.ModelAdmin):
     search_fields = ('title',)
 
 
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(ExportActionsMixin, admin.ModelAdmin):
     search_fields = ('name',)
 
 
-class CommentAdmin(admin.ModelAdmin):
-    search_fields = ('text', 'author__username', 'created_at', 'post__title',)
+class CommentAdmin(ExportActionsMixin, IndexedSearchMixin,
+                   admin.ModelAdmin):
+    search_kind = search.COMMENT
+    search_fields = ('author__username', 'post__title',)
 
 
 admin.site.register(Category, CategoryAdmin)
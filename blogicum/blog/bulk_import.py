@@ -0,0 +1,309 @@
+"""Потоковая загрузка фикстур в формате dumpdata большими пачками.
+
+loaddata читает весь документ в память и сохраняет объекты по одному.
+Здесь объекты читаются из файла по мере разбора (JSON-массив или JSON
+Lines), копятся по моделям и пишутся через bulk_create, по транзакции
+на каждые chunk_size объектов. Сигналы при этом не отправляются:
+производные данные (счётчики комментариев, статистику авторов) после
+загрузки пересчитывает команда import_fixture.
+"""
+import gzip
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.core.serializers import python
+from django.db import (DEFAULT_DB_ALIAS, connections, models, router,
+                       transaction)
+from django.utils import timezone
+
+from blog import search
+from blog.models import Comment, ImageStatus, Post
+
+User = get_user_model()
+
+READ_SIZE = 1 << 16
+SEPARATORS_RE = re.compile(r'[\s,]*')
+
+
+def _open(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def is_json_lines(path):
+    name = str(path)
+    if name.endswith('.gz'):
+        name = name[:-len('.gz')]
+    return name.endswith(('.jsonl', '.ndjson'))
+
+
+def read_objects(path):
+    """Объекты фикстуры по одному: JSON Lines (.jsonl, .ndjson) или
+    JSON-массив, как у dumpdata; файлы .gz распаковываются на лету.
+    """
+    with _open(path) as file:
+        if is_json_lines(path):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _read_array(file)
+
+
+def _read_array(file):
+    decoder = json.JSONDecoder()
+    buffer, position = file.read(READ_SIZE).lstrip(), 1
+    if not buffer.startswith('['):
+        raise ValueError('Фикстура должна быть JSON-массивом.')
+    finished = False
+    while not finished:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        objects, position, finished = _decode(
+            decoder, buffer, final=not chunk)
+        yield from objects
+
+
+def _decode(decoder, buffer, final):
+    """Целые объекты из начала buffer: (объекты, где остановились,
+    дошли ли до конца массива).
+    """
+    objects, position = [], 0
+    while True:
+        position = SEPARATORS_RE.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return objects, position, True
+        if position == len(buffer):
+            break
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            # Объект дочитан не до конца: ждём следующий кусок файла.
+            break
+        objects.append(obj)
+    if final:
+        raise ValueError('Фикстура оборвалась до закрывающей «]».')
+    return objects, position, False
+
+
+def _timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+@contextmanager
+def keep_timestamps(fields):
+    """bulk_create вызывает pre_save полей, и auto_now/auto_now_add
+    затёрли бы даты из фикстуры текущим временем.
+    """
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def prepare_post(post, now):
+    # То, что обычно выставляет Post.save(): видимость по pub_date
+    # и очередь обработки для загруженных изображений.
+    post.is_visible = post.pub_date <= now
+    if not post.image:
+        post.image_status = ImageStatus.NONE
+    elif not post.image_status:
+        post.image_status = ImageStatus.PENDING
+
+
+PREPARE = {Post: prepare_post}
+
+# Поисковый индекс обновляется сразу после записи пачки, одним вызовом
+# на модель.
+INDEX = {Post: search.index_posts, Comment: search.index_comments}
+
+
+class Importer:
+    """Загружает объекты фикстуры пачками.
+
+    С remap=True объекты получают новые id после уже существующих,
+    а ссылки на загруженные ранее объекты фикстуры переводятся через
+    словарь старый id → новый. Ссылки на объекты, которых в фикстуре
+    не было, остаются как есть. Объекты должны идти после тех,
+    на кого ссылаются, — в таком порядке их выгружает dumpdata.
+
+    С ignore_conflicts=True в счётчики, поисковый индекс и пересчёт
+    статистики попадают только действительно вставленные строки; их
+    находят по pk, поэтому объекты фикстуры без pk в этом режиме
+    не учитываются.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=1000,
+                 chunk_size=20000, remap=False, ignore_conflicts=False,
+                 exclude=(), progress=None):
+        self.using = using
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.remap = remap
+        self.ignore_conflicts = ignore_conflicts
+        self.exclude = {label.lower() for label in exclude}
+        self.progress = progress
+        self.id_map = defaultdict(dict)
+        self.next_ids = {}
+        self.pending = {}
+        self.m2m = defaultdict(list)
+        self.buffered = 0
+        self.counts = Counter()
+        self.user_ids = set()
+        self.timestamp_fields = {
+            model: _timestamp_fields(model) for model in apps.get_models()}
+        self.now = timezone.now()
+        self.started = time.perf_counter()
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.total / elapsed if elapsed else 0
+
+    def load(self, objects):
+        objects = (
+            obj for obj in objects
+            if obj['model'].lower() not in self.exclude
+        )
+        with keep_timestamps([
+                field for fields in self.timestamp_fields.values()
+                for field in fields]):
+            for deserialized in python.Deserializer(
+                    objects, using=self.using, ignorenonexistent=True):
+                if router.allow_migrate_model(
+                        self.using, type(deserialized.object)):
+                    self.add(deserialized.object, deserialized.m2m_data)
+            self.flush()
+
+    def add(self, obj, m2m_data):
+        model = type(obj)
+        if self.remap:
+            self.remap_object(obj, m2m_data)
+        for field in self.timestamp_fields[model]:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, self.now)
+        if model in PREPARE:
+            PREPARE[model](obj, self.now)
+        self.pending.setdefault(model, []).append(obj)
+        if m2m_data:
+            self.m2m[model].append((obj, m2m_data))
+        self.buffered += 1
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def remap_object(self, obj, m2m_data):
+        meta = obj._meta
+        for field in meta.concrete_fields:
+            if field.is_relation:
+                targets = self.id_map.get(field.related_model)
+                value = getattr(obj, field.attname)
+                if targets and value in targets:
+                    setattr(obj, field.attname, targets[value])
+        for name, values in m2m_data.items():
+            targets = self.id_map.get(meta.get_field(name).related_model)
+            if targets:
+                m2m_data[name] = [targets.get(pk, pk) for pk in values]
+        if isinstance(meta.pk, models.AutoField):
+            new_pk = self.allocate_id(type(obj))
+            self.id_map[type(obj)][obj.pk] = new_pk
+            obj.pk = new_pk
+
+    def allocate_id(self, model):
+        if model not in self.next_ids:
+            last = model._base_manager.using(self.using).aggregate(
+                last=models.Max('pk'))['last']
+            self.next_ids[model] = (last or 0) + 1
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def flush(self):
+        if not self.buffered:
+            return
+        with transaction.atomic(using=self.using):
+            inserted = set()
+            for model, objs in self.pending.items():
+                objs = self.bulk_create(model, objs)
+                inserted.update(map(id, objs))
+                self.counts[model._meta.label] += len(objs)
+                if model in INDEX:
+                    INDEX[model](objs)
+                for obj in objs:
+                    if model in (Post, Comment):
+                        self.user_ids.add(obj.author_id)
+                    elif model is User:
+                        self.user_ids.add(obj.pk)
+            for model, rows in self.m2m.items():
+                self.write_m2m(model, [
+                    row for row in rows if id(row[0]) in inserted])
+        self.pending, self.m2m, self.buffered = {}, defaultdict(list), 0
+        if self.progress:
+            self.progress(self)
+
+    def bulk_create(self, model, objs):
+        """Записывает objs и возвращает те, что действительно вставлены:
+        с ignore_conflicts — чьих pk не было до записи и есть после.
+        """
+        manager = model._base_manager.using(self.using)
+        if not self.ignore_conflicts:
+            manager.bulk_create(objs, batch_size=self.batch_size)
+            return objs
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        existing = self.existing_pks(manager, pks)
+        manager.bulk_create(
+            objs, batch_size=self.batch_size, ignore_conflicts=True)
+        stored = self.existing_pks(
+            manager, [pk for pk in pks if pk not in existing])
+        return [obj for obj in objs if obj.pk in stored]
+
+    def existing_pks(self, manager, pks):
+        found = set()
+        for start in range(0, len(pks), self.batch_size):
+            found.update(manager.filter(
+                pk__in=pks[start:start + self.batch_size]).values_list(
+                'pk', flat=True))
+        return found
+
+    def write_m2m(self, model, rows):
+        for name in {name for _, m2m_data in rows for name in m2m_data}:
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(
+                field.m2m_reverse_field_name()).attname
+            through._base_manager.using(self.using).bulk_create([
+                through(**{source: obj.pk, target: pk})
+                for obj, m2m_data in rows for pk in m2m_data.get(name, ())
+            ], batch_size=self.batch_size, ignore_conflicts=True)
+
+    def reset_sequences(self):
+        """После вставки с явными id счётчики в PostgreSQL и Oracle
+        нужно сдвинуть, как это делает loaddata.
+        """
+        connection = connections[self.using]
+        loaded = [apps.get_model(label) for label in self.counts]
+        statements = connection.ops.sequence_reset_sql(no_style(), loaded)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,50 @@
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'blog:version:{}'
+
+
+def _version_caches():
+    return [caches[alias] for alias in {'default', settings.PAGE_CACHE_ALIAS}]
+
+
+def new_version():
+    return uuid4().hex
+
+
+def digest(versions):
+    return md5(':'.join(versions).encode()).hexdigest()
+
+
+def get_versions(tags, alias='default', timeout=None):
+    """Версии тегов. Недостающие создаются на timeout секунд: тег может
+    прийти из URL (slug, имя пользователя), и бессрочные версии для
+    несуществующих объектов копились бы в кеше без конца. Истёкшая версия
+    создаётся заново, и записи со старой просто перестают находиться.
+    """
+    cache = caches[alias]
+    keys = {VERSION_KEY.format(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout)
+        versions.update(missing)
+    return {keys[key]: value for key, value in versions.items()}
+
+
+def versions_digest(tags, alias='default', timeout=None):
+    versions = get_versions(tags, alias, timeout)
+    return digest([versions[tag] for tag in tags])
+
+
+def bump(*tags):
+    # Новая версия делает недействительными все фрагменты с этим тегом,
+    # старые записи просто вытесняются из кеша по таймауту.
+    if not tags:
+        return
+    for cache in _version_caches():
+        cache.set_many(
+            {VERSION_KEY.format(tag): new_version() for tag in tags}, None)
@@ -0,0 +1,161 @@
+import pickle
+import socket
+import threading
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class RespError(Exception):
+    pass
+
+
+class RespConnection:
+    """Минимальный клиент протокола RESP: хватает для GET/SET/DEL,
+    поэтому подходит любой Redis-совместимый сервер (Redis, KeyDB,
+    Dragonfly и т. п.).
+    """
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def execute(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif isinstance(arg, int):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('RESP-сервер закрыл соединение')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RespError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RespError(f'Неизвестный ответ RESP: {line!r}')
+
+
+class RespCache(BaseCache):
+    """Кеш-бэкенд Django поверх Redis-совместимого сервера.
+
+    LOCATION — 'host:port', OPTIONS может содержать DB и SOCKET_TIMEOUT.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        host, _, port = server.partition(':')
+        self._address = (host or '127.0.0.1', int(port or 6379))
+        options = params.get('OPTIONS', {})
+        self._db = options.get('DB', 0)
+        self._socket_timeout = options.get('SOCKET_TIMEOUT', 1.0)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = RespConnection(*self._address, self._socket_timeout)
+            if self._db:
+                connection.execute('SELECT', self._db)
+            self._local.connection = connection
+        return connection
+
+    def _execute(self, *args):
+        try:
+            return self._connection().execute(*args)
+        except (OSError, ConnectionError):
+            self._disconnect()
+            return self._connection().execute(*args)
+
+    def _expiry_args(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return ()
+        return ('PX', max(int(timeout * 1000), 1))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._execute(
+            'SET', self._key(key, version), pickle.dumps(value), 'NX',
+            *self._expiry_args(timeout)) is not None
+
+    def get(self, key, default=None, version=None):
+        value = self._execute('GET', self._key(key, version))
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout == 0:
+            self.delete(key, version=version)
+            return
+        self._execute('SET', self._key(key, version), pickle.dumps(value),
+                      *self._expiry_args(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return bool(self._execute('PERSIST', key)) or bool(
+                self._execute('EXISTS', key))
+        return bool(self._execute(
+            'PEXPIRE', key, max(int(timeout * 1000), 1)))
+
+    def delete(self, key, version=None):
+        return bool(self._execute('DEL', self._key(key, version)))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._execute(
+            'MGET', *(self._key(key, version) for key in keys))
+        return {
+            key: pickle.loads(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+    def has_key(self, key, version=None):
+        return bool(self._execute('EXISTS', self._key(key, version)))
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Django закрывает кеши в конце каждого запроса; соединение
+        # с сервером переживает запрос и переиспользуется потоком.
+        pass
+
+    def _disconnect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            try:
+                connection.close()
+            except OSError:
+                pass
@@ -0,0 +1,78 @@
+"""Потоковая выгрузка постов, комментариев, категорий и мест.
+
+Строки читаются через values_list(...).iterator() без создания объектов
+моделей и отдаются генератором, поэтому память не зависит от размера
+таблицы. JSON Lines пишется в формате объектов dumpdata — такой файл
+загружает команда import_fixture; CSV — плоская таблица для анализа.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from blog.models import Category, Comment, Location, Post
+
+CHUNK_SIZE = 2000
+
+# Сначала модели, на которые ссылаются остальные: в этом порядке
+# выгрузку можно загрузить обратно.
+MODELS = {model._meta.model_name: model
+          for model in (Category, Location, Post, Comment)}
+
+CONTENT_TYPES = {
+    'jsonl': 'application/jsonl; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def get_queryset(model, since=None):
+    queryset = model.objects.all()
+    if since is not None:
+        queryset = queryset.changed_since(since)
+    return queryset
+
+
+def _rows(queryset):
+    fields = queryset.model._meta.concrete_fields
+    rows = queryset.order_by('pk').values_list(
+        *(field.attname for field in fields))
+    return fields, rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def render_jsonl(queryset):
+    label = queryset.model._meta.label_lower
+    fields, rows = _rows(queryset)
+    names = [field.name for field in fields]
+    pk_name = queryset.model._meta.pk.name
+    for row in rows:
+        values = dict(zip(names, row))
+        pk = values.pop(pk_name)
+        yield json.dumps(
+            {'model': label, 'pk': pk, 'fields': values},
+            cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Файл для csv.writer, который просто возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def render_csv(queryset):
+    writer = csv.writer(_Echo())
+    fields, rows = _rows(queryset)
+    yield writer.writerow([field.attname for field in fields])
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+RENDERERS = {'jsonl': render_jsonl, 'csv': render_csv}
@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+
+from blog import stamps
+from blog.models import AuthorStats, Category, Post, User
+
+
+class LatestPostsFeed(Feed):
+    """Лента новых публикаций с условным GET.
+
+    ETag и Last-Modified строятся по отметке изменений из БД (blog.stamps),
+    которая не убывает и при удалении или снятии публикаций, и по типу
+    ленты: RSS и Atom — разные представления. Если клиент прислал
+    актуальные значения, ответ 304 отдаётся до запроса элементов ленты.
+    """
+
+    title = 'Блогикум'
+    description = 'Новые публикации Блогикума.'
+
+    def __call__(self, request, *args, **kwargs):
+        etag, last_modified = stamps.validators(
+            self.get_change_stamp(**kwargs), self.feed_type.__name__)
+        etag = quote_etag(etag)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().__call__(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            # Feed сам ставит Last-Modified по последнему элементу; он
+            # убывает, если этот элемент удалить.
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_change_stamp(self):
+        return stamps.page_changed_at(Post.objects)
+
+    def get_posts(self, obj):
+        return Post.published.all()
+
+    def link(self):
+        return reverse('blog:index')
+
+    def items(self, obj):
+        return self.get_posts(obj).order_by(
+            '-pub_date', '-id')[:settings.FEED_ITEMS_COUNT]
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('blog:post_detail', kwargs={'pk': post.pk})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_author_name(self, post):
+        return post.author.username
+
+    def item_author_link(self, post):
+        return reverse(
+            'blog:profile', kwargs={'username': post.author.username})
+
+    def item_categories(self, post):
+        return (post.category.title,)
+
+
+class CategoryFeed(LatestPostsFeed):
+    def get_change_stamp(self, category_slug):
+        return stamps.page_changed_at(
+            Post.objects.filter(category__slug=category_slug))
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, is_published=True, slug=category_slug)
+
+    def title(self, category):
+        return f'Блогикум: {category.title}'
+
+    def description(self, category):
+        return category.description
+
+    def link(self, category):
+        return reverse('blog:category_posts',
+                       kwargs={'category_slug': category.slug})
+
+    def get_posts(self, category):
+        return Post.published.filter(category=category)
+
+
+class AuthorFeed(LatestPostsFeed):
+    def get_change_stamp(self, username):
+        return stamps.page_changed_at(
+            Post.objects.filter(author__username=username),
+            AuthorStats.objects.filter(profile__user__username=username))
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Блогикум: публикации @{author.username}'
+
+    def description(self, author):
+        return f'Новые публикации пользователя @{author.username}.'
+
+    def link(self, author):
+        return reverse('blog:profile', kwargs={'username': author.username})
+
+    def get_posts(self, author):
+        return Post.published.filter(author=author)
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class CategoryAtomFeed(CategoryFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
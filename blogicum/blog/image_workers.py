@@ -0,0 +1,23 @@
+"""Запуск процессов пула обработки изображений (команда process_images).
+
+Модуль не импортирует модели: процесс, запущенный через spawn,
+загружает инициализатор до django.setup().
+"""
+import django
+from django.conf import settings
+
+# Настройки, от которых зависит обработка файлов: родитель мог
+# переопределить их уже после запуска.
+WORKER_SETTINGS = (
+    'MEDIA_ROOT', 'IMAGE_QUALITY', 'THUMBNAIL_WIDTHS', 'THUMBNAIL_FORMATS',
+    'THUMBNAIL_QUALITY')
+
+
+def current_settings():
+    return {name: getattr(settings, name) for name in WORKER_SETTINGS}
+
+
+def init(overrides):
+    django.setup()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
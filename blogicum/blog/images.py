@@ -0,0 +1,158 @@
+"""Очередь обработки загруженных изображений.
+
+Очередью служит сама таблица постов: image_status = 'pending' ставит
+Post.save(), воркер (команда process_images) забирает посты по одному
+атомарным UPDATE, а тяжёлая работа с файлами идёт в пуле процессов.
+
+Обработанный файл подменяет оригинал под тем же именем. Воркер не может
+сбросить кеши веб-процессов (у каждого свой LocMem), поэтому страницы и
+карточки, закешированные до обработки, должны и дальше ссылаться на
+существующий файл.
+"""
+import os
+import tempfile
+from concurrent.futures import BrokenExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from blog import page_cache, thumbnails
+from blog.models import ImageStatus, Post
+
+# Параметры перекодирования по форматам; метаданные (EXIF, GPS, ICC и т. п.)
+# не передаются в save() и поэтому не сохраняются.
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'method': 6},
+}
+
+
+def replace_file(name, data, storage=default_storage):
+    """Атомарно заменяет содержимое файла name на data.
+
+    data пишется во временный файл в том же каталоге и переименовывается
+    поверх оригинала: при любом сбое на месте остаётся либо старый файл,
+    либо новый целиком. Нужна локальная файловая система (storage.path).
+    """
+    path = storage.path(name)
+    directory, base = os.path.split(path)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f'.{base}.')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.chmod(temporary, os.stat(path).st_mode & 0o777)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+def normalize(name, storage=default_storage):
+    """Поворачивает изображение по EXIF, удаляет метаданные, пережимает
+    файл на месте и строит уменьшенные копии; возвращает имя файла.
+    Работает только с файлами, поэтому выполняется в дочернем процессе
+    без обращений к БД.
+    """
+    with storage.open(name) as source, Image.open(source) as image:
+        pil_format = image.format
+        if getattr(image, 'is_animated', False):
+            data = None
+        else:
+            image = ImageOps.exif_transpose(image)
+            if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            buffer = BytesIO()
+            image.save(buffer, pil_format, quality=settings.IMAGE_QUALITY,
+                       **SAVE_OPTIONS.get(pil_format, {}))
+            data = buffer.getvalue()
+    if data is not None:
+        replace_file(name, data, storage)
+    thumbnails.generate(name, storage)
+    return name
+
+
+def requeue_stale():
+    """Возвращает в очередь посты, брошенные упавшим воркером."""
+    return Post.objects.filter(image_status=ImageStatus.PROCESSING).update(
+        image_status=ImageStatus.PENDING)
+
+
+def claim(limit):
+    """Забирает до limit постов из очереди: [(pk, имя файла)].
+
+    Пост достаётся тому воркеру, чей UPDATE первым сменил статус.
+    """
+    claimed = []
+    pending = Post.objects.filter(
+        image_status=ImageStatus.PENDING).order_by('id').values_list(
+        'pk', 'image')
+    for pk, name in pending[:limit]:
+        if Post.objects.filter(
+                pk=pk, image=name, image_status=ImageStatus.PENDING
+        ).update(image_status=ImageStatus.PROCESSING):
+            claimed.append((pk, name))
+    return claimed
+
+
+def release(pks):
+    return Post.objects.filter(
+        pk__in=list(pks), image_status=ImageStatus.PROCESSING
+    ).update(image_status=ImageStatus.PENDING)
+
+
+def finish(pk, name, ok):
+    """Записывает результат обработки name.
+
+    Новый updated_at меняет отметки страниц (blog.stamps), которые
+    веб-процессы читают из БД. Сброс кеша страниц отсюда доходит до них,
+    только если этот кеш общий; в любом случае старый HTML ссылается на
+    тот же, уже обработанный файл.
+    """
+    status = ImageStatus.DONE if ok else ImageStatus.FAILED
+    # Пока шла обработка, автор мог заменить фото: тогда результат
+    # не сохраняем, новый файл уже стоит в очереди.
+    if not Post.objects.filter(pk=pk, image=name).update(
+            image_status=status, updated_at=timezone.now()):
+        return False
+    cache.delete(thumbnails.THUMBNAILS_KEY.format(name))
+    page_cache.purge_rows(page_cache.page_rows(pk=pk))
+    return True
+
+
+def process_pending(executor=None, limit=100):
+    """Обрабатывает одну пачку очереди и возвращает {pk: успех}.
+
+    Без executor файлы обрабатываются в текущем процессе.
+    """
+    jobs = claim(limit)
+    if executor is None:
+        runs = [partial(normalize, name) for _, name in jobs]
+    else:
+        try:
+            runs = [executor.submit(normalize, name).result
+                    for _, name in jobs]
+        except BrokenExecutor:
+            # Пул упал ещё на прошлой пачке: эти файлы ни при чём,
+            # возвращаем их в очередь, пул перезапустит вызывающий.
+            release(pk for pk, _ in jobs)
+            raise
+    results = {}
+    for (pk, name), run in zip(jobs, runs):
+        try:
+            run()
+        except Exception:
+            # Любая ошибка, в том числе упавший процесс пула, помечает пост
+            # FAILED: иначе requeue_stale() возвращал бы его в очередь,
+            # и тот же файл снова и снова ронял бы воркер.
+            finish(pk, name, ok=False)
+            results[pk] = False
+        else:
+            results[pk] = finish(pk, name, ok=True)
+    return results
@@ -0,0 +1,65 @@
+import gzip
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog import exports
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает категории, места, посты и комментарии '
+            'в JSON Lines (формат import_fixture) или CSV, по файлу на '
+            'модель.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Что выгружать: ' + ', '.join(exports.MODELS)
+                 + ' (по умолчанию всё).')
+        parser.add_argument(
+            '--format', choices=exports.RENDERERS, default='jsonl')
+        parser.add_argument(
+            '--since',
+            help='Только созданное или изменённое с этого момента '
+                 '(ISO 8601, например 2024-06-01T00:00:00).')
+        parser.add_argument(
+            '--output', type=Path, default=Path('.'),
+            help='Каталог для файлов.')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы gzip.')
+
+    def handle(self, *args, models, output, since, **options):
+        unknown = set(models) - set(exports.MODELS)
+        if unknown:
+            raise CommandError(f'Неизвестные модели: {", ".join(unknown)}')
+        if since is not None:
+            since = self.parse_since(since)
+        output.mkdir(parents=True, exist_ok=True)
+        fmt = options['format']
+        for name in models or exports.MODELS:
+            queryset = exports.get_queryset(exports.MODELS[name], since)
+            path = output / f'{name}.{fmt}'
+            if options['gzip']:
+                path = path.with_name(path.name + '.gz')
+                file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+            else:
+                file = open(path, 'w', encoding='utf-8', newline='')
+            with file:
+                count = 0
+                for line in exports.RENDERERS[fmt](queryset):
+                    file.write(line)
+                    count += 1
+            if fmt == 'csv':
+                count -= 1
+            self.stdout.write(f'{path}: {count}')
+        self.stdout.write(self.style.SUCCESS('Выгрузка завершена'))
+
+    def parse_since(self, value):
+        moment = parse_datetime(value)
+        if moment is None:
+            raise CommandError(f'Не удалось разобрать дату --since: {value}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog import image_workers
+from blog.images import process_pending, requeue_stale
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает загруженные фото постов: поворот по EXIF, '
+            'удаление метаданных, пережатие и уменьшенные копии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов обработки.')
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько постов забирать из очереди за раз.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками пустой очереди в режиме --loop, с.')
+
+    def handle(self, *args, workers=1, batch=100, loop=False, interval=5,
+               **options):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь: {requeued}')
+        while True:
+            try:
+                self.process(workers, batch, loop, interval)
+            except BrokenExecutor:
+                # Процесс пула упал на каком-то файле; пост с этим файлом
+                # уже помечен FAILED, работаем дальше на новом пуле.
+                self.stderr.write('Пул процессов упал, запускаем новый.')
+            else:
+                return
+
+    def process(self, workers, batch, loop, interval):
+        # spawn, а не fork: дочерние процессы не наследуют соединения
+        # с БД и работают только с файлами.
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=image_workers.init,
+                initargs=(image_workers.current_settings(),),
+                mp_context=multiprocessing.get_context('spawn'),
+        ) as executor:
+            while True:
+                results = process_pending(executor, limit=batch)
+                if results:
+                    failed = sum(not ok for ok in results.values())
+                    self.stdout.write(
+                        f'Обработано изображений: {len(results)}, '
+                        f'с ошибкой или устарело: {failed}')
+                elif not loop:
+                    return
+                else:
+                    time.sleep(interval)
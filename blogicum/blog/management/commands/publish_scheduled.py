@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduling import publish_due_posts, refresh_next_due
+
+
+class Command(BaseCommand):
+    help = ('Делает видимыми отложенные публикации, у которых наступила '
+            'дата публикации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к ближайшей публикации.')
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help='Максимальная пауза между проверками в режиме --loop, с.')
+
+    def handle(self, *args, loop=False, interval=60, **options):
+        while True:
+            post_ids = publish_due_posts()
+            if post_ids:
+                self.stdout.write(
+                    f'Опубликовано отложенных постов: {len(post_ids)}')
+            next_due = refresh_next_due()
+            if not loop:
+                return
+            delay = interval
+            if next_due is not None:
+                until_due = (next_due - timezone.now()).total_seconds()
+                delay = max(0, min(interval, until_due))
+            time.sleep(delay)
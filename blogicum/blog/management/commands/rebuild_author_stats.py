@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from blog import page_cache
+from blog.cache import bump
+from blog.stats import BATCH_SIZE, rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает с нуля статистику авторов: число постов, '
+            'комментариев и последнюю активность.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пересчитать только этих пользователей.')
+
+    def handle(self, *args, usernames=(), **options):
+        users = User.objects.order_by('pk')
+        if usernames:
+            users = users.filter(username__in=usernames)
+        count = rebuild(None if not usernames else users.values_list(
+            'pk', flat=True))
+        # Шапки профилей в кеше страниц показывают старые счётчики.
+        batch = []
+        for username in users.values_list('username', flat=True).iterator():
+            batch.append(page_cache.profile_page_tag(username))
+            if len(batch) == BATCH_SIZE:
+                bump(*batch)
+                batch = []
+        bump(*batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитана статистика авторов: {count}'))
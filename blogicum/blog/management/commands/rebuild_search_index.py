@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import search
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Полностью перестраивает поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.get_index().clear()
+            posts = Post.objects.only('pk', 'title', 'text')
+            for post in posts.iterator(chunk_size=2000):
+                search.index_post(post)
+            comments = Comment.objects.only('pk', 'post_id', 'text')
+            for comment in comments.iterator(chunk_size=2000):
+                search.index_comment(comment)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count по таблице комментариев.'
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(post=OuterRef('pk')).values(
+            'post').annotate(total=Count('pk')).values('total')
+        actual = Coalesce(Subquery(counts), 0)
+        # Один UPDATE с коррелированным подзапросом: список id в памяти
+        # и в параметрах запроса не растёт с числом расхождений. Новый
+        # updated_at меняет ключи карточек и отметки страниц этих постов.
+        fixed = Post.objects.exclude(comment_count=actual).update(
+            comment_count=actual, updated_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков комментариев: {fixed}'))
@@ -0,0 +1,50 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog import sitemaps
+
+INDEX_NAME = 'sitemap.xml'
+
+
+class Command(BaseCommand):
+    help = ('Собирает карту сайта в статические файлы: sitemap.xml и '
+            'файлы разделов. Запускается по расписанию (cron), файлы '
+            'отдаёт веб-сервер по тем же адресам, что и blog:sitemap.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', required=True,
+            help='Адрес сайта для ссылок, например https://example.com.')
+        parser.add_argument(
+            '--output', type=Path, default=settings.SITEMAP_ROOT,
+            help='Каталог для файлов (по умолчанию SITEMAP_ROOT).')
+
+    def handle(self, *args, base_url, output, **options):
+        base_url = base_url.rstrip('/')
+        output.mkdir(parents=True, exist_ok=True)
+        shards = list(sitemaps.all_shards())
+        names = {INDEX_NAME}
+        for section, number, _ in shards:
+            name = sitemaps.shard_name(section, number)
+            self.write(output / name, sitemaps.render_shard(
+                base_url, section, number))
+            names.add(name)
+        # Индекс пишется последним: он ссылается только на готовые файлы.
+        self.write(output / INDEX_NAME, sitemaps.render_index(
+            base_url, shards))
+        for path in output.glob('sitemap-*.xml'):
+            if path.name not in names:
+                path.unlink()
+        self.stdout.write(self.style.SUCCESS(
+            f'Карта сайта собрана: {len(shards)} файлов в {output}'))
+
+    def write(self, path, chunks):
+        # Запись через временный файл: веб-сервер не увидит
+        # недописанную карту.
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.writelines(chunks)
+        os.replace(temporary, path)
@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS. Нужна для локальной проверки чтения '
+            'с реплик; настоящие реплики наполняет репликация СУБД.')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копировать можно только базу SQLite.')
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            if replica.vendor != 'sqlite':
+                raise CommandError(f'Реплика {alias} — не SQLite.')
+            # Открытое соединение Django со старым файлом не нужно.
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
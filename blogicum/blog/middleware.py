@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from blog.routers import replica_reads
+from blog.scheduling import publish_if_due
+
+STICKY_COOKIE = 'primary_db'
+
+
+class ScheduledPublicationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        publish_if_due()
+        return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Читает с реплик в GET и HEAD. Клиент, который только что что-то
+    записал, получает куку и REPLICA_STICKY_SECONDS читает с основной
+    базы — так автор сразу видит свой пост или комментарий, даже если
+    реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        enabled = (request.method in ('GET', 'HEAD')
+                   and STICKY_COOKIE not in request.COOKIES)
+        with replica_reads(enabled) as routing:
+            response = self.get_response(request)
+        if routing.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
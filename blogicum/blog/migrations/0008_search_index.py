@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# DDL записан здесь целиком, а не берётся из blog.search: миграция должна
+# давать ту же схему, как бы ни менялся код приложения. RunSQL не подходит,
+# потому что на сборке SQLite без FTS5 таблицу нужно пропустить.
+CREATE_SEARCH_INDEX = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS blog_search_index USING fts5('
+    'post_id UNINDEXED, title, body, '
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+# Встроенная колонка rank считает bm25 с весами колонок (заголовок 10,
+# текст 1); в отличие от прямого вызова bm25() её можно агрегировать
+# через GROUP BY.
+SET_SEARCH_RANK = (
+    'INSERT INTO blog_search_index (blog_search_index, rank) '
+    "VALUES ('rank', 'bm25(0, 10.0, 1.0)')"
+)
+INDEX_POSTS = (
+    'INSERT INTO blog_search_index (rowid, post_id, title, body) '
+    'SELECT id * 2, id, title, text FROM blog_post'
+)
+INDEX_COMMENTS = (
+    'INSERT INTO blog_search_index (rowid, post_id, title, body) '
+    "SELECT id * 2 + 1, post_id, '', text FROM blog_comment "
+    'WHERE post_id IS NOT NULL'
+)
+DROP_SEARCH_INDEX = 'DROP TABLE IF EXISTS blog_search_index'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        if ('ENABLE_FTS5',) not in cursor.fetchall():
+            return
+        for sql in (CREATE_SEARCH_INDEX, SET_SEARCH_RANK, INDEX_POSTS,
+                    INDEX_COMMENTS):
+            cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.exclude(image='').update(image_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'Нет изображения'), ('pending', 'В очереди на обработку'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('failed', 'Ошибка обработки')], default='', editable=False, help_text='Загруженное фото обрабатывает команда process_images.', max_length=16, verbose_name='Обработка изображения'),
+        ),
+        migrations.RunPython(queue_existing_images, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('image_status', 'pending')), fields=['id'], name='post_image_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_image_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.profile', verbose_name='Профиль')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('published_post_count', models.PositiveIntegerField(default=0, verbose_name='Опубликованных публикаций')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_activity', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    # Правки до миграции неизвестны: считаем объект не менявшимся
+    # с момента создания.
+    for model_name in ('Category', 'Location', 'Post'):
+        model = apps.get_model('blog', model_name)
+        model.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
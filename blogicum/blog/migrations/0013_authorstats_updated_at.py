@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:20
+
+from django.db import migrations
+
+
+def fill_author_stats(apps, schema_editor):
+    # Та же пересборка, что у rebuild_author_stats, пачками по
+    # stats.BATCH_SIZE, но по историческим моделям миграции.
+    from blog import stats
+    stats.rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_comment_field_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
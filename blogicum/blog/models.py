@@ -5,12 +5,25 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-class PostManager(models.Manager):
+# Наступление pub_date материализовано в is_visible планировщиком
+# (blog.scheduling), поэтому условие не зависит от текущего времени.
+PUBLISHED_POSTS = models.Q(
+    is_visible=True, is_published=True, category__is_published=True)
+
+
+class ChangesQuerySet(models.QuerySet):
+    def changed_since(self, moment):
+        """Объекты, созданные или изменённые не раньше moment.
+
+        Граница включительная: при инкрементальной выгрузке объект лучше
+        получить дважды, чем пропустить.
+        """
+        return self.filter(updated_at__gte=moment)
+
+
+class PostManager(models.Manager.from_queryset(ChangesQuerySet)):
     def get_queryset(self):
-        return super().get_queryset().filter(pub_date__lte=timezone.now(),
-                                             is_published=True,
-                                             category__is_published=True
-                                             ).select_related(
+        return super().get_queryset().filter(PUBLISHED_POSTS).select_related(
             'location', 'author', 'category')
 
 
@@ -22,6 +35,11 @@ class BaseModel(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True, verbose_name='Изменено'
+    )
+
+    objects = ChangesQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -57,8 +75,16 @@ class Location(BaseModel):
         return self.name
 
 
+class ImageStatus(models.TextChoices):
+    NONE = '', 'Нет изображения'
+    PENDING = 'pending', 'В очереди на обработку'
+    PROCESSING = 'processing', 'Обрабатывается'
+    DONE = 'done', 'Обработано'
+    FAILED = 'failed', 'Ошибка обработки'
+
+
 class Post(BaseModel):
-    objects = models.Manager()
+    objects = ChangesQuerySet.as_manager()
     published = PostManager()
     title = models.CharField(max_length=256, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
@@ -72,7 +98,7 @@ class Post(BaseModel):
         )
     )
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, blank=False,
+        User, on_delete=models.CASCADE, blank=False, db_index=False,
         verbose_name='Автор публикации',
         related_name='posts'
     )
@@ -81,18 +107,70 @@ class Post(BaseModel):
         verbose_name='Местоположение', related_name='posts'
     )
     category = models.ForeignKey(
-        Category, null=True, on_delete=models.SET_NULL,
+        Category, null=True, on_delete=models.SET_NULL, db_index=False,
         verbose_name='Категория', related_name='posts'
     )
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество комментариев'
+    )
+    is_visible = models.BooleanField(
+        default=False, editable=False,
+        verbose_name='Дата публикации наступила',
+        help_text='Выставляется при сохранении и планировщиком публикаций.'
+    )
+    image_status = models.CharField(
+        max_length=16, choices=ImageStatus.choices, default=ImageStatus.NONE,
+        blank=True, editable=False, verbose_name='Обработка изображения',
+        help_text='Загруженное фото обрабатывает команда process_images.'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('is_published', '-pub_date'),
+                         name='post_feed_idx'),
+            models.Index(fields=('-pub_date',),
+                         condition=models.Q(is_published=True,
+                                            is_visible=True),
+                         name='post_published_feed_idx'),
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_visible=False),
+                         name='post_scheduled_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='post_author_feed_idx'),
+            models.Index(fields=('category', 'is_published', '-pub_date'),
+                         name='post_category_feed_idx'),
+            models.Index(fields=('id',),
+                         condition=models.Q(
+                             image_status=ImageStatus.PENDING),
+                         name='post_image_queue_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.pub_date is not None:
+            self.is_visible = self.pub_date <= timezone.now()
+        if not self.image:
+            self.image_status = ImageStatus.NONE
+        elif not self.image._committed:
+            # Новый файл ещё не записан в хранилище: его обработает
+            # воркер, запрос не ждёт (blog.images).
+            self.image_status = ImageStatus.PENDING
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {
+                'pub_date': 'is_visible',
+                'image': 'image_status',
+            }
+            kwargs['update_fields'] = {*update_fields, 'updated_at', *(
+                derived[field] for field in update_fields if field in derived
+            )}
+        super().save(*args, **kwargs)
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, null=True, on_delete=models.CASCADE)
@@ -101,13 +179,55 @@ class Profile(models.Model):
         return str(self.user)
 
 
+class AuthorStats(models.Model):
+    """Счётчики для шапки профиля: поддерживаются сигналами
+    (blog.stats), пересобираются командой rebuild_author_stats.
+    """
+
+    profile = models.OneToOneField(
+        Profile, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='Профиль'
+    )
+    post_count = models.PositiveIntegerField(
+        default=0, verbose_name='Публикаций'
+    )
+    published_post_count = models.PositiveIntegerField(
+        default=0, verbose_name='Опубликованных публикаций'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0, verbose_name='Комментариев'
+    )
+    last_activity = models.DateTimeField(
+        null=True, blank=True, verbose_name='Последняя активность'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.profile)
+
+
+class CommentQuerySet(models.QuerySet):
+    def changed_since(self, moment):
+        # Своей отметки изменения у комментария нет: правка и удаление
+        # комментария обновляют updated_at его публикации.
+        return self.filter(
+            models.Q(created_at__gte=moment)
+            | models.Q(post__updated_at__gte=moment))
+
+
 class Comment(models.Model):
+    objects = CommentQuerySet.as_manager()
+
     text = models.TextField(
         verbose_name='Комментарии',
         help_text=('Здесь можно написать содержимое комментария')
     )
     post = models.ForeignKey(
-        Post, null=True, on_delete=models.CASCADE,
+        Post, null=True, on_delete=models.CASCADE, db_index=False,
         related_name='comments',
         verbose_name='Публикация',
         help_text=('Публикация, к которой привязан комментарий')
@@ -126,3 +246,7 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_idx'),
+        )
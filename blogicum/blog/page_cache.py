@@ -0,0 +1,93 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.http import urlencode
+
+from blog.cache import bump, versions_digest
+
+PAGE_PARAMS = ('page', 'after', 'before')
+INDEX_TAG = 'page:index'
+# Входит в ключ каждой страницы: его смена сбрасывает весь кеш страниц.
+ALL_PAGES_TAG = 'page:all'
+
+
+def post_page_tag(pk):
+    return f'page:post:{pk}'
+
+
+def category_page_tag(slug):
+    return f'page:category:{slug}'
+
+
+def profile_page_tag(username):
+    return f'page:profile:{username}'
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def cache_key(request, tag):
+    # Параметры, не влияющие на страницу, в ключ не попадают, чтобы
+    # произвольные ?utm=... не размножали записи в кеше.
+    params = urlencode([
+        (name, request.GET[name]) for name in PAGE_PARAMS
+        if name in request.GET
+    ])
+    location = md5(f'{request.path}?{params}'.encode()).hexdigest()
+    return f'page:{location}:{page_digest(tag)}'
+
+
+def page_digest(tag):
+    return versions_digest(
+        [ALL_PAGES_TAG, tag], settings.PAGE_CACHE_ALIAS,
+        settings.PAGE_CACHE_TIMEOUT)
+
+
+def get_response(key):
+    cached = _cache().get(key)
+    if cached is None:
+        return None
+    content, headers = cached
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+def store_response(key, response):
+    headers = {header: response[header] for header in STORED_HEADERS
+               if response.has_header(header)}
+    _cache().set(key, (response.content, headers),
+                 settings.PAGE_CACHE_TIMEOUT)
+
+
+def page_rows(*extra, **filters):
+    """Строки (pk, slug категории, имя автора) для purge_rows; поля или
+    выражения extra добавляются в конец строки тем же запросом.
+    """
+    from blog.models import Post
+    return Post.objects.filter(**filters).values_list(
+        'pk', 'category__slug', 'author__username', *extra)
+
+
+def purge_rows(rows, *extra_tags):
+    """Сбрасывает страницы, на которых показаны посты из rows:
+    ленту, страницы самих постов, их категорий и авторов.
+    """
+    tags = {INDEX_TAG, *extra_tags}
+    for pk, category_slug, username in rows:
+        tags.add(post_page_tag(pk))
+        if category_slug:
+            tags.add(category_page_tag(category_slug))
+        tags.add(profile_page_tag(username))
+    bump(*tags)
+
+
+def purge_all():
+    bump(ALL_PAGES_TAG)
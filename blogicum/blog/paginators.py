@@ -0,0 +1,167 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def encode_cursor(values):
+    payload = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+# Границы INTEGER в SQLite: большее число не привязать к запросу.
+MIN_INTEGER, MAX_INTEGER = -2 ** 63, 2 ** 63 - 1
+
+
+def _decode_value(field, value):
+    if isinstance(field, models.DateTimeField):
+        if not isinstance(value, str):
+            return None
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            return None
+        if value is not None and settings.USE_TZ and is_naive(value):
+            return None
+        return value
+    if isinstance(field, models.IntegerField):
+        if (isinstance(value, int) and not isinstance(value, bool)
+                and MIN_INTEGER <= value <= MAX_INTEGER):
+            return value
+        return None
+    return value if isinstance(value, str) else None
+
+
+def decode_cursor(token, fields):
+    """Значения полей сортировки fields (поля модели) из курсора.
+
+    Курсор приходит из URL, поэтому каждое значение проверяется по типу
+    своего поля: иначе кривой курсор падал бы в сравнении или при
+    привязке параметра к запросу, а не давал InvalidCursor.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Некорректный курсор')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor('Некорректный курсор')
+    result = [_decode_value(field, value)
+              for field, value in zip(fields, values)]
+    if None in result:
+        raise InvalidCursor('Некорректный курсор')
+    return result
+
+
+class CursorPage:
+    """Страница keyset-пагинации: без COUNT(*) и без OFFSET."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def is_cursor(self):
+        return True
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.cursor_for(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.cursor_for(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по набору полей сортировки, например
+    ('-pub_date', '-id'). Курсор кодирует значения этих полей у
+    крайнего объекта страницы, поэтому глубина страницы не влияет
+    на стоимость запроса.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+
+    def cursor_for(self, obj):
+        return encode_cursor(
+            [getattr(obj, field) for field in self.fields])
+
+    def _reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def _seek(self, values, forward):
+        condition = Q()
+        equal = {}
+        for ordering, field, value in zip(
+                self.ordering, self.fields, values):
+            descending = ordering.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def page(self, after=None, before=None):
+        if after and before:
+            raise InvalidCursor('Нельзя указывать after и before вместе')
+        queryset = self.queryset
+        forward = not before
+        token = after or before
+        if token:
+            meta = self.queryset.model._meta
+            values = decode_cursor(
+                token, [meta.get_field(field) for field in self.fields])
+            queryset = queryset.filter(self._seek(values, forward))
+        ordering = self.ordering if forward else self._reversed_ordering()
+        objects = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if forward:
+            return CursorPage(objects, self, has_more, bool(after))
+        objects.reverse()
+        return CursorPage(objects, self, True, has_more)
@@ -0,0 +1,87 @@
+"""Чтение с реплик базы данных.
+
+Запись всегда идёт в default. Чтения уходят на реплику из
+DATABASE_REPLICAS только там, где их включил replica_reads(), — в GET-
+и HEAD-запросах (blog.middleware.ReplicaRoutingMiddleware). Реплика
+выбирается одна на весь блок, чтобы, например, COUNT(*) пагинатора и
+список страницы читались из одного снимка. После первой записи
+дальнейшие чтения того же запроса идут в default: реплика могла ещё не
+получить только что записанное. Чтения, по которым тут же пишется
+(счётчики, планировщик), оборачиваются в primary_reads().
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class Routing:
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+        self._replica = None
+
+    @property
+    def replica(self):
+        if self._replica is None:
+            self._replica = random.choice(settings.DATABASE_REPLICAS)
+        return self._replica
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Включает чтение с реплик внутри блока; routing.wrote после блока
+    говорит, была ли в нём запись.
+    """
+    routing = Routing(enabled)
+    token = _routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Чтения внутри блока идут в default, даже если реплики включены.
+
+    Для чтений, результат которых записывается: агрегаты отстающей
+    реплики не должны попасть в основную базу. Запись в блоке, как и
+    вне его, переключает на default весь оставшийся запрос.
+    """
+    routing = _routing.get()
+    if routing is None:
+        yield
+        return
+    use_replicas, routing.use_replicas = routing.use_replicas, False
+    try:
+        yield
+    finally:
+        routing.use_replicas = use_replicas
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (routing is None or not routing.use_replicas or routing.wrote
+                or not settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db not in settings.DATABASE_REPLICAS
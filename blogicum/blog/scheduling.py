@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.dispatch import Signal
+from django.utils import timezone
+
+from blog.models import Post
+from blog.routers import primary_reads
+
+NEXT_DUE_KEY = 'blog:scheduler:next_due'
+NOTHING_SCHEDULED = 'nothing'
+
+# Отправляется, когда у отложенных публикаций наступила pub_date.
+# Аргумент post_ids — список id постов, ставших видимыми.
+post_became_visible = Signal()
+
+
+@primary_reads()
+def publish_due_posts(now=None):
+    now = now or timezone.now()
+    due = Post.objects.filter(is_visible=False, pub_date__lte=now)
+    post_ids = list(due.values_list('pk', flat=True))
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids, is_visible=False).update(
+            is_visible=True, updated_at=now)
+        post_became_visible.send(sender=Post, post_ids=post_ids)
+    return post_ids
+
+
+# Срок кешируется надолго: читаем его с основной базы, а не с реплики.
+@primary_reads()
+def refresh_next_due():
+    next_due = Post.objects.filter(is_visible=False).aggregate(
+        next_due=Min('pub_date'))['next_due']
+    cache.set(NEXT_DUE_KEY, next_due or NOTHING_SCHEDULED,
+              settings.SCHEDULER_RECHECK_INTERVAL)
+    return next_due
+
+
+def schedule(pub_date):
+    next_due = cache.get(NEXT_DUE_KEY)
+    if next_due is None:
+        return
+    if next_due == NOTHING_SCHEDULED or pub_date < next_due:
+        cache.set(NEXT_DUE_KEY, pub_date, settings.SCHEDULER_RECHECK_INTERVAL)
+
+
+def publish_if_due():
+    """Дешёвая проверка для каждого запроса: пока срок ближайшей
+    отложенной публикации не наступил, обращается только к кешу.
+    """
+    next_due = cache.get(NEXT_DUE_KEY)
+    if next_due is None:
+        next_due = refresh_next_due()
+    if next_due in (None, NOTHING_SCHEDULED) or next_due > timezone.now():
+        return []
+    post_ids = publish_due_posts()
+    refresh_next_due()
+    return post_ids
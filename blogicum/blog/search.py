@@ -0,0 +1,269 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+FTS_TABLE = 'blog_search_index'
+# Те же веса колонок задаёт rank таблицы FTS5 в миграции 0008.
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# rowid индекса = id * 2 + вид документа: так обновление и удаление
+# документа идут по rowid, без полного просмотра виртуальной таблицы.
+POST, COMMENT = 0, 1
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def make_rowid(kind, object_id):
+    return object_id * 2 + kind
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+class SQLiteFTSIndex:
+    def update(self, kind, object_id, post_id, title, body):
+        self.update_many([(kind, object_id, post_id, title, body)])
+
+    def update_many(self, documents):
+        rows = [
+            (make_rowid(kind, object_id), post_id, title, body)
+            for kind, object_id, post_id, title, body in documents
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [row[:1] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, post_id, title, body) '
+                'VALUES (%s, %s, %s, %s)', rows)
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [make_rowid(kind, object_id)],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, terms, kind=None, limit=None):
+        match = ' '.join(
+            '"{}"*'.format(term.replace('"', '""')) for term in terms)
+        if kind is None:
+            sql = (
+                f'SELECT post_id, MIN(rank) AS best FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                'GROUP BY post_id ORDER BY best, post_id LIMIT %s'
+            )
+        else:
+            sql = (
+                f'SELECT rowid / 2 FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid %% 2 = {kind} '
+                'ORDER BY rank LIMIT %s'
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, limit or -1])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class MemoryIndex:
+    """Инвертированный индекс в памяти процесса на случай, когда FTS5
+    недоступен. Заполняется из БД при первом обращении и дальше
+    поддерживается сигналами.
+
+    Только для одного процесса (тесты, runserver): сигналы обновляют
+    индекс лишь в процессе, который записал публикацию, и остальные
+    воркеры продолжают искать по устаревшим данным.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._postings = defaultdict(dict)
+        self._documents = {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            from blog.models import Comment, Post
+            posts = Post.objects.values_list('pk', 'title', 'text')
+            for pk, title, text in posts.iterator():
+                self._add(POST, pk, pk, title, text)
+            comments = Comment.objects.values_list('pk', 'post_id', 'text')
+            for pk, post_id, text in comments.iterator():
+                self._add(COMMENT, pk, post_id, '', text)
+
+    def _add(self, kind, object_id, post_id, title, body):
+        rowid = make_rowid(kind, object_id)
+        self._remove(rowid)
+        weights = defaultdict(float)
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(body):
+            weights[term] += BODY_WEIGHT
+        for term, weight in weights.items():
+            self._postings[term][rowid] = weight
+        self._documents[rowid] = (post_id, tuple(weights))
+
+    def _remove(self, rowid):
+        document = self._documents.pop(rowid, None)
+        if document is None:
+            return
+        for term in document[1]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(rowid, None)
+                if not postings:
+                    del self._postings[term]
+
+    def update(self, kind, object_id, post_id, title, body):
+        self.update_many([(kind, object_id, post_id, title, body)])
+
+    def update_many(self, documents):
+        with self._lock:
+            if self._loaded:
+                for document in documents:
+                    self._add(*document)
+
+    def remove(self, kind, object_id):
+        with self._lock:
+            self._remove(make_rowid(kind, object_id))
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._loaded = False
+
+    def search(self, terms, kind=None, limit=None):
+        self._ensure_loaded()
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = None
+            for term in terms:
+                matched = defaultdict(float)
+                for word, postings in self._postings.items():
+                    if not word.startswith(term):
+                        continue
+                    idf = math.log(1 + total / len(postings))
+                    for rowid, weight in postings.items():
+                        matched[rowid] += weight * idf
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {
+                        rowid: score + matched[rowid]
+                        for rowid, score in scores.items() if rowid in matched
+                    }
+            results = defaultdict(float)
+            for rowid, score in (scores or {}).items():
+                if kind is None:
+                    post_id = self._documents[rowid][0]
+                    results[post_id] = max(results[post_id], score)
+                elif rowid % 2 == kind:
+                    results[rowid // 2] = score
+        ranked = sorted(results, key=lambda pk: (-results[pk], pk))
+        return ranked[:limit] if limit else ranked
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                backend = settings.SEARCH_BACKEND
+                if backend == 'auto':
+                    backend = 'fts5' if fts5_available() else 'memory'
+                _index = SQLiteFTSIndex() if backend == 'fts5' else (
+                    MemoryIndex())
+    return _index
+
+
+def index_post(post):
+    index_posts([post])
+
+
+def index_posts(posts):
+    get_index().update_many(
+        (POST, post.pk, post.pk, post.title, post.text) for post in posts)
+
+
+def index_comment(comment):
+    index_comments([comment])
+
+
+def index_comments(comments):
+    get_index().update_many(
+        (COMMENT, comment.pk, comment.post_id, '', comment.text)
+        for comment in comments if comment.post_id)
+
+
+def unindex_post(post):
+    get_index().remove(POST, post.pk)
+
+
+def unindex_comment(comment):
+    get_index().remove(COMMENT, comment.pk)
+
+
+def search_ids(query, kind=None):
+    """Идентификаторы публикаций, отсортированные по релевантности.
+
+    При заданном kind ищутся только документы этого вида, и возвращаются
+    id постов или комментариев.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_index().search(
+        terms, kind=kind, limit=settings.SEARCH_MAX_RESULTS)
+
+
+class SearchResults:
+    """Ленивый список видимых публикаций в порядке релевантности:
+    Paginator забирает из БД только посты текущей страницы.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        visible = set(
+            queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        self.ids = [pk for pk in ids if pk in visible]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        ids = self.ids[index]
+        if not isinstance(index, slice):
+            return self.queryset.get(pk=ids)
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,319 @@
+from weakref import WeakValueDictionary
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog import page_cache, scheduling, search, stats, thumbnails
+from blog.cache import bump
+from blog.models import AuthorStats, Category, Comment, Location, Post
+
+User = get_user_model()
+
+
+# Своего updated_at у комментария нет: любая его правка отмечается
+# в updated_at публикации (см. CommentQuerySet.changed_since).
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if raw or not instance.post_id:
+        return
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+# Посты, которые удаляются прямо сейчас: комментарии к ним уходят
+# каскадом вместе с постом, и пересчитывать их счётчик незачем. Порядок
+# post_delete поста и его комментариев не гарантирован, поэтому отметку
+# не снимаем: по завершении удаления Django обнуляет pk экземпляра,
+# а сама запись исчезает вместе с экземпляром.
+_deleting_posts = WeakValueDictionary()
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    _deleting_posts[instance.pk] = instance
+
+
+def _post_is_deleting(post_id):
+    post = _deleting_posts.get(post_id)
+    return post is not None and post.pk == post_id
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении (например, вместе с автором).
+    if instance.post_id and not _post_is_deleting(instance.post_id):
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=Greatest(F('comment_count') - 1, 0),
+            updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Post)
+def schedule_post(sender, instance, raw=False, **kwargs):
+    if not raw and not instance.is_visible:
+        scheduling.schedule(instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_comment(instance)
+
+
+def _update_fields_touch(update_fields, *fields):
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_before(sender, instance, raw=False, **kwargs):
+    # Прежние файл, страницы и владельцы поста — одним запросом для
+    # обработчиков post_save ниже.
+    instance._image_before = instance._owners_before = None
+    instance._pages_before = []
+    if not instance.pk or raw:
+        return
+    row = page_cache.page_rows(
+        'image', 'category_id', 'author_id', pk=instance.pk).first()
+    if row is not None:
+        instance._pages_before = [row[:3]]
+        instance._image_before = row[3]
+        instance._owners_before = row[4:]
+
+
+@receiver(post_save, sender=Post)
+def delete_replaced_thumbnails(sender, instance, raw=False, **kwargs):
+    # Копии нового файла построит воркер обработки изображений.
+    image_before = getattr(instance, '_image_before', None)
+    if not raw and image_before and image_before != instance.image.name:
+        thumbnails.delete(image_before, instance.image.storage)
+
+
+@receiver(post_delete, sender=Post)
+def delete_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        thumbnails.delete(instance.image.name, instance.image.storage)
+
+
+@receiver(post_save, sender=Post)
+def purge_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    page_cache.purge_rows([
+        *getattr(instance, '_pages_before', []),
+        *page_cache.page_rows(pk=instance.pk),
+    ])
+
+
+@receiver(pre_delete, sender=Post)
+def purge_deleted_post_pages(sender, instance, **kwargs):
+    page_cache.purge_rows(page_cache.page_rows(pk=instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, raw=False, **kwargs):
+    if not instance.post_id or raw:
+        return
+    # В шапке профиля комментатора показано число его комментариев: его
+    # имя читаем тем же запросом, что и страницы поста.
+    commenter = User.objects.filter(pk=instance.author_id).values('username')
+    rows = list(page_cache.page_rows(Subquery(commenter), pk=instance.post_id))
+    page_cache.purge_rows(
+        [row[:3] for row in rows],
+        *(page_cache.profile_page_tag(row[3]) for row in rows if row[3]))
+
+
+@receiver(scheduling.post_became_visible)
+def purge_visible_post_pages(sender, post_ids, **kwargs):
+    page_cache.purge_rows(page_cache.page_rows(pk__in=post_ids))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    instance._slug_before = instance._published_before = None
+    if instance.pk and not raw:
+        instance._slug_before, instance._published_before = (
+            Category.objects.filter(pk=instance.pk).values_list(
+                'slug', 'is_published').first() or (None, None))
+
+
+@receiver(post_save, sender=Category)
+def purge_category_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tags = {page_cache.category_page_tag(instance.slug)}
+    slug_before = getattr(instance, '_slug_before', None)
+    if slug_before:
+        tags.add(page_cache.category_page_tag(slug_before))
+    page_cache.purge_rows(
+        page_cache.page_rows(category=instance).iterator(), *tags)
+
+
+@receiver(post_save, sender=Location)
+def purge_location_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.purge_rows(
+            page_cache.page_rows(location=instance).iterator())
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Location)
+def purge_orphaned_post_pages(sender, instance, **kwargs):
+    page_cache.purge_rows(page_cache.page_rows(
+        **{sender._meta.model_name: instance}).iterator())
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._username_before = None
+    if (instance.pk and not raw
+            and _update_fields_touch(update_fields, 'username')):
+        instance._username_before = User.objects.filter(
+            pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Шапка профиля показывает поля пользователя, поэтому страница
+    # профиля сбрасывается при любом сохранении.
+    bump(page_cache.profile_page_tag(instance.username))
+    username_before = getattr(instance, '_username_before', None)
+    if created or username_before in (None, instance.username):
+        return
+    tags = {page_cache.profile_page_tag(username_before)}
+    # Имя показано и в комментариях пользователя к чужим постам.
+    page_cache.purge_rows(
+        page_cache.page_rows(author=instance).iterator(), *tags)
+    page_cache.purge_rows(page_cache.page_rows(
+        pk__in=Comment.objects.filter(author=instance).values('post_id')
+    ).iterator())
+
+
+@receiver(post_save, sender=Post)
+def update_post_author_stats(sender, instance, created, raw=False,
+                             **kwargs):
+    if raw:
+        return
+    if created:
+        stats.post_created(instance)
+    stats.refresh_published([instance.author_id])
+
+
+@receiver(post_delete, sender=Post)
+def update_deleted_post_author_stats(sender, instance, **kwargs):
+    stats.post_deleted(instance)
+    stats.refresh_published([instance.author_id], create_missing=False)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_author_stats(sender, instance, created, raw=False,
+                                **kwargs):
+    if created and not raw:
+        stats.comment_created(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def update_deleted_comment_author_stats(sender, instance, **kwargs):
+    stats.comment_deleted(instance)
+
+
+@receiver(scheduling.post_became_visible)
+def update_visible_post_author_stats(sender, post_ids, **kwargs):
+    stats.posts_became_visible(post_ids)
+
+
+@receiver(post_save, sender=Category)
+def update_category_author_stats(sender, instance, raw=False, **kwargs):
+    published_before = getattr(instance, '_published_before', None)
+    if raw or published_before in (None, instance.is_published):
+        return
+    stats.refresh_published(instance.posts.order_by().values_list(
+        'author_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.create_for_user(instance)
+
+
+# Отметки изменений страниц (blog.stamps) не должны убывать: когда
+# публикация пропадает со страницы, отмечаем то, что на странице осталось.
+@receiver(post_save, sender=Post)
+def touch_previous_owners(sender, instance, raw=False, **kwargs):
+    owners_before = getattr(instance, '_owners_before', None)
+    if raw or owners_before is None:
+        return
+    category_id, author_id = owners_before
+    if category_id != instance.category_id:
+        Category.objects.filter(pk=category_id).update(
+            updated_at=timezone.now())
+    if author_id != instance.author_id:
+        stats.refresh_published([author_id], create_missing=False)
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post_category(sender, instance, **kwargs):
+    # Статистику автора обновляет update_deleted_post_author_stats.
+    if instance.category_id:
+        Category.objects.filter(pk=instance.category_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Location)
+def touch_orphaned_posts(sender, instance, **kwargs):
+    Post.objects.filter(**{sender._meta.model_name: instance}).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_author_posts(sender, instance, created, raw=False,
+                               **kwargs):
+    username_before = getattr(instance, '_username_before', None)
+    if raw or created or username_before in (None, instance.username):
+        return
+    # Имя показано в карточках публикаций автора и в его комментариях.
+    Post.objects.filter(
+        Q(author=instance) | Q(pk__in=Comment.objects.filter(
+            author=instance).values('post_id'))
+    ).update(updated_at=timezone.now())
+
+
+# Поля пользователя в шапке профиля: их правка отмечается в updated_at
+# статистики автора, которая входит в отметку страницы профиля.
+PROFILE_HEADER_FIELDS = (
+    'username', 'first_name', 'last_name', 'date_joined', 'is_staff')
+
+
+@receiver(post_save, sender=User)
+def touch_profile_header(sender, instance, created, raw=False,
+                         update_fields=None, **kwargs):
+    if raw or created or not _update_fields_touch(
+            update_fields, *PROFILE_HEADER_FIELDS):
+        return
+    AuthorStats.objects.filter(profile__user=instance).update(
+        updated_at=timezone.now())
@@ -0,0 +1,176 @@
+"""Карта сайта: индекс и файлы разделов (посты, категории, профили).
+
+Каждый раздел разбит на файлы по диапазонам ключа: в файл с номером n
+попадают строки с ключом от n * SITEMAP_URLS_PER_FILE до следующей
+границы. Так в файле не больше допустимого числа адресов, пост не
+переезжает в другой файл при удалении соседей, а выборка файла — это
+проход по индексу без OFFSET. XML отдаётся генераторами по мере чтения
+строк через .iterator(), без загрузки всей таблицы в память.
+
+Индекс требует GROUP BY по всем опубликованным постам, поэтому готовый
+XML хранится в кеше страниц под тегом ленты (page_cache.INDEX_TAG): его
+сбрасывает любое изменение, которое меняет и ленту.
+"""
+from abc import ABC, abstractmethod
+from hashlib import md5
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import ExpressionWrapper, F, IntegerField, Max
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from blog import page_cache
+from blog.models import Post
+from blog.routers import primary_reads
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class Section(ABC):
+    """Раздел карты сайта над опубликованными постами.
+
+    key — поле, по диапазонам которого раздел делится на файлы;
+    values() — строки (параметры адреса, lastmod) одного файла.
+    """
+
+    name = None
+    key = None
+    lastmod = Max('updated_at')
+
+    def get_queryset(self):
+        return Post.published.order_by()
+
+    @abstractmethod
+    def values(self, queryset):
+        """Строки файла: (значение для location(), lastmod)."""
+
+    @abstractmethod
+    def location(self, value):
+        """Путь страницы по значению из values()."""
+
+    def shards(self):
+        """Непустые файлы раздела: [(номер, lastmod)]."""
+        shard = ExpressionWrapper(
+            F(self.key) / settings.SITEMAP_URLS_PER_FILE,
+            output_field=IntegerField())
+        return self.get_queryset().annotate(shard=shard).values(
+            'shard').annotate(lastmod=self.lastmod).order_by(
+            'shard').values_list('shard', 'lastmod')
+
+    def get_shard_queryset(self, number):
+        size = settings.SITEMAP_URLS_PER_FILE
+        return self.get_queryset().filter(**{
+            f'{self.key}__gte': number * size,
+            f'{self.key}__lt': (number + 1) * size,
+        })
+
+    def urls(self, number):
+        values = self.values(self.get_shard_queryset(number))
+        for value, lastmod in values.iterator(
+                chunk_size=settings.SITEMAP_CHUNK_SIZE):
+            yield self.location(value), lastmod
+
+
+class PostSection(Section):
+    name = 'posts'
+    key = 'pk'
+
+    def values(self, queryset):
+        return queryset.order_by('pk').values_list('pk', 'updated_at')
+
+    def location(self, pk):
+        return reverse('blog:post_detail', kwargs={'pk': pk})
+
+
+class CategorySection(Section):
+    """Категории с опубликованными постами; lastmod учитывает и правки
+    самой категории.
+    """
+
+    name = 'categories'
+    key = 'category_id'
+    lastmod = Greatest(Max('updated_at'), Max('category__updated_at'))
+
+    def values(self, queryset):
+        return queryset.values('category_id').annotate(
+            lastmod=self.lastmod).order_by('category_id').values_list(
+            'category__slug', 'lastmod')
+
+    def location(self, slug):
+        return reverse('blog:category_posts', kwargs={'category_slug': slug})
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+    key = 'author_id'
+
+    def values(self, queryset):
+        return queryset.values('author_id').annotate(
+            lastmod=self.lastmod).order_by('author_id').values_list(
+            'author__username', 'lastmod')
+
+    def location(self, username):
+        return reverse('blog:profile', kwargs={'username': username})
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), CategorySection(), ProfileSection())
+}
+
+
+def shard_name(section, number):
+    return f'sitemap-{section}-{number}.xml'
+
+
+def _lastmod(moment):
+    return f'<lastmod>{moment.isoformat(timespec="seconds")}</lastmod>'
+
+
+def all_shards():
+    """Файлы всех разделов: (раздел, номер, lastmod)."""
+    for section in SECTIONS.values():
+        for number, lastmod in section.shards():
+            yield section.name, number, lastmod
+
+
+def render_index(base_url, shards=None):
+    """Индекс карты сайта по частям; base_url — адрес сайта без
+    завершающего «/».
+    """
+    yield XML_HEADER
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    if shards is None:
+        shards = all_shards()
+    for section, number, lastmod in shards:
+        location = escape(f'{base_url}/{shard_name(section, number)}')
+        yield (f'<sitemap><loc>{location}</loc>'
+               f'{_lastmod(lastmod)}</sitemap>\n')
+    yield '</sitemapindex>\n'
+
+
+def cached_index(base_url):
+    """Индекс карты сайта одной строкой из кеша страниц."""
+    digest = page_cache.page_digest(page_cache.INDEX_TAG)
+    key = f'sitemap:{md5(base_url.encode()).hexdigest()}:{digest}'
+    cache = caches[settings.PAGE_CACHE_ALIAS]
+    content = cache.get(key)
+    if content is None:
+        # Как и страницы, индекс под новой версией тега собираем по
+        # основной базе: реплика могла ещё не получить изменение.
+        with primary_reads():
+            content = ''.join(render_index(base_url))
+        cache.set(key, content, settings.PAGE_CACHE_TIMEOUT)
+    return content
+
+
+def render_shard(base_url, section, number):
+    yield XML_HEADER
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    for location, lastmod in SECTIONS[section].urls(number):
+        yield (f'<url><loc>{escape(base_url + location)}</loc>'
+               f'{_lastmod(lastmod)}</url>\n')
+    yield '</urlset>\n'
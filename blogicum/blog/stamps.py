@@ -0,0 +1,70 @@
+"""Отметки изменений для условных GET страниц и лент блога.
+
+Отметка страницы — самое позднее updated_at среди показанных на ней
+объектов и общих для всех страниц категорий и местоположений. Отметки
+читаются из БД (MAX по индексу updated_at), поэтому одинаковы во всех
+процессах, и не убывают: удаление и перенос публикации обновляют
+updated_at её категории и статистики автора, смена имени пользователя —
+публикаций, на которых оно показано (blog.signals).
+"""
+from hashlib import md5
+
+from django.db import connections
+from django.db.models import Max, Value
+
+from blog.models import Category, Location
+
+
+def latest_change(queryset):
+    """Подзапрос MAX(updated_at) по queryset. Группировка по константе
+    убирает GROUP BY: пустой queryset даёт одну строку с NULL.
+    """
+    return queryset.order_by().annotate(anchor=Value(1)).values(
+        'anchor').annotate(stamp=Max('updated_at')).values('stamp')
+
+
+def changed_at(*querysets):
+    """Самое позднее updated_at среди querysets.
+
+    Считается одним запросом SELECT (...), (...) без общей таблицы:
+    MAX каждого queryset вычисляется отдельно, и пустой queryset
+    не обнуляет отметки остальных.
+    """
+    using = querysets[0].db
+    connection = connections[using]
+    columns, params = [], []
+    for queryset in querysets:
+        sql, query_params = latest_change(queryset).query.get_compiler(
+            using).as_sql()
+        columns.append(f'({sql})')
+        params.extend(query_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {", ".join(columns)}', params)
+        row = cursor.fetchone()
+    stamps = []
+    for queryset, value in zip(querysets, row):
+        column = queryset.model._meta.get_field('updated_at').get_col(
+            queryset.model._meta.db_table)
+        for converter in (connection.ops.get_db_converters(column)
+                          + column.get_db_converters(connection)):
+            value = converter(value, column, connection)
+        if value is not None:
+            stamps.append(value)
+    return max(stamps, default=None)
+
+
+def page_changed_at(*querysets):
+    """Отметка страницы с объектами из querysets. Категории и
+    местоположения учитываются всегда: их названия и флаги видны
+    в карточках публикаций на всех страницах.
+    """
+    return changed_at(Category.objects, Location.objects, *querysets)
+
+
+def validators(stamp, *parts):
+    """Валидаторы ETag и Last-Modified (unix) по отметке и прочему, от
+    чего зависит представление (parts).
+    """
+    values = [stamp.isoformat() if stamp else '', *map(str, parts)]
+    etag = md5(':'.join(values).encode()).hexdigest()
+    return etag, int(stamp.timestamp()) if stamp else None
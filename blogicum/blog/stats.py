@@ -0,0 +1,165 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from blog.models import PUBLISHED_POSTS, AuthorStats, Post, Profile
+from blog.routers import primary_reads
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+@primary_reads()
+def rebuild(user_ids=None, apps=global_apps):
+    """Пересчитывает статистику авторов с нуля: всех или только user_ids.
+
+    Недостающие профили создаются. Считает пачками по BATCH_SIZE
+    авторов, по одному GROUP BY-запросу на посты и комментарии пачки,
+    и всегда по основной базе: агрегаты реплики могут отставать.
+    Миграции передают свой реестр apps с историческими моделями.
+    """
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    if user_ids is None:
+        user_ids = list(
+            user_model.objects.order_by('pk').values_list('pk', flat=True))
+    else:
+        # Переданный список может быть любой длины, а pk__in по нему
+        # упирается в лимит параметров SQLite: отбираем пачками.
+        user_ids = sorted(set(user_ids))
+    rebuilt = 0
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = list(user_model.objects.filter(
+            pk__in=user_ids[start:start + BATCH_SIZE]).values_list(
+            'pk', flat=True))
+        if batch:
+            _rebuild_batch(apps, batch)
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def _rebuild_batch(apps, user_ids):
+    post_model = apps.get_model('blog', 'Post')
+    comment_model = apps.get_model('blog', 'Comment')
+    profile_model = apps.get_model('blog', 'Profile')
+    stats_model = apps.get_model('blog', 'AuthorStats')
+    posts = {
+        row['author_id']: row for row in post_model.objects.filter(
+            author_id__in=user_ids).order_by().values('author_id').annotate(
+            total=Count('pk'), published=Count('pk', filter=PUBLISHED_POSTS),
+            last=Max('created_at'))
+    }
+    comments = {
+        row['author_id']: row for row in comment_model.objects.filter(
+            author_id__in=user_ids).order_by().values('author_id').annotate(
+            total=Count('pk'), last=Max('created_at'))
+    }
+    with transaction.atomic():
+        existing = set(profile_model.objects.filter(
+            user_id__in=user_ids).values_list('user_id', flat=True))
+        profile_model.objects.bulk_create(
+            [profile_model(user_id=pk)
+             for pk in user_ids if pk not in existing])
+        profiles = dict(profile_model.objects.filter(
+            user_id__in=user_ids).values_list('user_id', 'pk'))
+        stats_model.objects.filter(profile_id__in=profiles.values()).delete()
+        stats = []
+        for user_id, profile_id in profiles.items():
+            post_row = posts.get(user_id, {})
+            comment_row = comments.get(user_id, {})
+            activity = [
+                row['last'] for row in (post_row, comment_row) if row]
+            stats.append(stats_model(
+                profile_id=profile_id,
+                post_count=post_row.get('total', 0),
+                published_post_count=post_row.get('published', 0),
+                comment_count=comment_row.get('total', 0),
+                last_activity=max(activity, default=None),
+            ))
+        stats_model.objects.bulk_create(stats)
+
+
+def create_for_user(user):
+    profile, _ = Profile.objects.get_or_create(user=user)
+    AuthorStats.objects.get_or_create(profile=profile)
+
+
+def for_user(user):
+    """Строка статистики автора для чтения.
+
+    Строку создаёт сигнал при регистрации пользователя, а тем, кто
+    заведён раньше, — миграция 0015_backfill_author_stats. Если её всё же
+    нет (пользователь загружен в обход сигналов), возвращаются
+    несохранённые нули: показ профиля не пишет в базу, недостающие строки
+    собирает команда rebuild_author_stats.
+    """
+    try:
+        return user.profile.stats
+    except ObjectDoesNotExist:
+        return AuthorStats()
+
+
+def _update(user_id, create_missing=True, **values):
+    updated = AuthorStats.objects.filter(profile__user_id=user_id).update(
+        updated_at=timezone.now(), **values)
+    # Новую строку собираем пересчётом: в нём уже учтён текущий объект.
+    # При удалениях не создаём — это может быть каскад от удаления автора.
+    if not updated and create_missing:
+        rebuild([user_id])
+
+
+def _touched(moment):
+    return Greatest(Coalesce('last_activity', Value(moment)), Value(moment))
+
+
+def post_created(post):
+    _update(post.author_id, post_count=F('post_count') + 1,
+            last_activity=_touched(post.created_at))
+
+
+def post_deleted(post):
+    _update(post.author_id, create_missing=False,
+            post_count=Greatest(F('post_count') - 1, 0))
+
+
+def comment_created(comment):
+    _update(comment.author_id, comment_count=F('comment_count') + 1,
+            last_activity=_touched(comment.created_at))
+
+
+def comment_deleted(comment):
+    _update(comment.author_id, create_missing=False,
+            comment_count=Greatest(F('comment_count') - 1, 0))
+
+
+@primary_reads()
+def posts_became_visible(post_ids):
+    counts = (
+        Post.published.filter(pk__in=post_ids).order_by()
+        .values('author_id').annotate(count=Count('pk'))
+        .values_list('author_id', 'count')
+    )
+    for user_id, count in counts:
+        _update(user_id, published_post_count=F(
+            'published_post_count') + count)
+
+
+@primary_reads()
+def refresh_published(user_ids, create_missing=True):
+    """Пересчитывает число опубликованных постов у авторов: оно зависит
+    от флагов поста, его категории и наступления даты публикации.
+    """
+    user_ids = set(user_ids)
+    counts = dict(
+        Post.published.filter(author_id__in=user_ids).order_by()
+        .values('author_id').annotate(count=Count('pk'))
+        .values_list('author_id', 'count')
+    )
+    for user_id in user_ids:
+        _update(user_id, create_missing=create_missing,
+                published_post_count=counts.get(user_id, 0))
@@ -0,0 +1,42 @@
+from hashlib import md5
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.routers import primary_reads
+
+register = template.Library()
+
+
+def card_key(post):
+    """Ключ карточки по данным, которые уже загружены вместе с постом.
+
+    Любая правка, видная в карточке, обновляет updated_at поста, его
+    категории или местоположения (комментарии, смена имени автора и
+    обработка фото — через blog.signals и blog.images), поэтому ключ
+    одинаков во всех процессах и не зависит от сброса их кешей.
+    """
+    stamps = [post.updated_at, post.comment_count]
+    for related in ('category', 'location'):
+        if getattr(post, f'{related}_id'):
+            stamps.append(getattr(post, related).updated_at)
+    digest = md5(':'.join(map(str, stamps)).encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+@register.simple_tag
+def post_card(post):
+    key = card_key(post)
+    html = cache.get(key)
+    if html is None:
+        # Ключ и поля взяты из одного снимка; связанные объекты, которые
+        # карточка догружает сама, читаем с основной базы, чтобы
+        # отстающая реплика не подмешала в неё старые данные.
+        with primary_reads():
+            html = render_to_string(
+                'includes/post_card.html', {'post': post})
+        cache.set(key, html, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
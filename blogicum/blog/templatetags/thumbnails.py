@@ -0,0 +1,26 @@
+from django import template
+
+from blog import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(image, css_class='', sizes='40rem', lazy=False):
+    """Изображение поста с вариантами нужной ширины в srcset: браузер
+    сам выбирает формат и размер, оригинал остаётся запасным src.
+    """
+    sources = {}
+    for width, fmt, name in thumbnails.get_variants(image):
+        sources.setdefault(fmt, []).append(
+            f'{image.storage.url(name)} {width}w')
+    return {
+        'image': image,
+        'css_class': css_class,
+        'sizes': sizes,
+        'lazy': lazy,
+        'sources': [
+            {'type': thumbnails.FORMATS[fmt][2], 'srcset': ', '.join(srcset)}
+            for fmt, srcset in sources.items()
+        ],
+    }
@@ -0,0 +1,119 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import ExifTags, features, Image, ImageOps
+
+from blog.models import ImageStatus
+
+THUMBNAILS_KEY = 'thumbnails:{}'
+
+# Формат Pillow, расширение файла и MIME-тип варианта.
+FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+
+
+def enabled_formats():
+    return [
+        name for name in settings.THUMBNAIL_FORMATS
+        if name != 'webp' or features.check('webp')
+    ]
+
+
+def variant_name(name, width, fmt):
+    """Имя варианта рядом с оригиналом:
+    posts_images/photo.jpg → posts_images/photo.w640.webp.
+    """
+    root, _ = posixpath.splitext(name)
+    return f'{root}.w{width}.{FORMATS[fmt][1]}'
+
+
+def _encode(image, fmt):
+    pil_format = FORMATS[fmt][0]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, pil_format, quality=settings.THUMBNAIL_QUALITY,
+               optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate(name, storage):
+    """Создаёт недостающие варианты изображения и возвращает их список
+    [(ширина, формат, имя файла)], от узких к широким.
+
+    Шире оригинала варианты не делаются: увеличение только прибавило бы
+    байтов без деталей.
+    """
+    widths = sorted(settings.THUMBNAIL_WIDTHS)
+    formats = enabled_formats()
+    variants = []
+    with storage.open(name) as source, Image.open(source) as image:
+        # Ширины считаются по изображению после поворота по EXIF, а сам
+        # поворот выполняется после draft(): тот работает только до
+        # загрузки пикселей.
+        rotated = image.getexif().get(ExifTags.Base.Orientation) in (
+            5, 6, 7, 8)
+        width, height = image.size
+        if rotated:
+            width, height = height, width
+        widths = [target for target in widths if target < width]
+        if widths:
+            # JPEG умеет декодироваться сразу в уменьшенном масштабе;
+            # размер для draft() задаётся в осях файла, до поворота.
+            size = (widths[-1], int(height * widths[-1] / width) + 1)
+            image.draft('RGB', size[::-1] if rotated else size)
+            image = ImageOps.exif_transpose(image)
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = None
+            for fmt in formats:
+                target = variant_name(name, width, fmt)
+                if not storage.exists(target):
+                    if resized is None:
+                        resized = image.resize(
+                            (width, height), Image.Resampling.LANCZOS)
+                    storage.save(target, _encode(resized, fmt))
+                variants.append((width, fmt, target))
+    cache.set(THUMBNAILS_KEY.format(name), variants, None)
+    return variants
+
+
+def get_variants(image_file):
+    """Варианты обработанного изображения по уже лежащим в хранилище
+    файлам.
+
+    Вызывается при рендеринге страницы, поэтому изображение здесь не
+    декодируется: копии создаёт только воркер (blog.images), пропавшие
+    файлы он создаст заново, если вернуть пост в очередь.
+    """
+    instance = getattr(image_file, 'instance', None)
+    if not image_file or getattr(
+            instance, 'image_status', ImageStatus.DONE) != ImageStatus.DONE:
+        # До обработки воркером (blog.images) отдаём только оригинал.
+        return []
+    name = image_file.name
+    variants = cache.get(THUMBNAILS_KEY.format(name))
+    if variants is None:
+        # Копий шире оригинала воркер не делает — их файлов просто нет.
+        variants = [
+            (width, fmt, variant_name(name, width, fmt))
+            for width in sorted(settings.THUMBNAIL_WIDTHS)
+            for fmt in enabled_formats()
+            if image_file.storage.exists(variant_name(name, width, fmt))
+        ]
+        cache.set(THUMBNAILS_KEY.format(name), variants, None)
+    return variants
+
+
+def delete(name, storage):
+    for width in settings.THUMBNAIL_WIDTHS:
+        for fmt in FORMATS:
+            target = variant_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+    cache.delete(THUMBNAILS_KEY.format(name))
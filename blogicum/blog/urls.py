@@ -1,6 +1,6 @@
 from django.urls import path
 
-from blog import views
+from blog import feeds, views
 
 app_name = 'blog'
 
@@ -8,6 +8,8 @@ urlpatterns = [
     path('', views.IndexListView.as_view(), name='index'),
     path('posts/<int:pk>/', views.PostDetailView.as_view(),
          name='post_detail'),
+    path('posts/<int:pk>/comments/', views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:pk>/edit/', views.PostUpdateView.as_view(),
          name='edit_post'),
@@ -23,6 +25,22 @@ urlpatterns = [
          views.CategoryPostsListView.as_view(), name='category_posts'),
     path('profile/<slug:username>/', views.ShowProfileView.as_view(),
          name='profile'),
+    path('feed/', feeds.LatestPostsFeed(), name='feed'),
+    path('feed/atom/', feeds.LatestPostsAtomFeed(), name='feed_atom'),
+    path('category/<slug:category_slug>/feed/', feeds.CategoryFeed(),
+         name='category_feed'),
+    path('category/<slug:category_slug>/feed/atom/',
+         feeds.CategoryAtomFeed(), name='category_feed_atom'),
+    path('profile/<slug:username>/feed/', feeds.AuthorFeed(),
+         name='profile_feed'),
+    path('profile/<slug:username>/feed/atom/', feeds.AuthorAtomFeed(),
+         name='profile_feed_atom'),
+    path('sitemap.xml', views.SitemapIndexView.as_view(), name='sitemap'),
+    path('sitemap-<slug:section>-<int:number>.xml',
+         views.SitemapView.as_view(), name='sitemap_section'),
+    path('metrics/db/', views.DatabaseMetricsView.as_view(),
+         name='db_metrics'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path(
         'edit_profile/', views.UpdateProfileView.as_view(), name='edit_profile'
     ),
@@ -1,15 +1,30 @@
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import (ListView, DetailView, UpdateView, CreateView,
-                                  DeleteView)
+                                  DeleteView, View)
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import User
 from django.urls import reverse_lazy
-from django.db.models import Count
-from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import (http_date, parse_http_date_safe, quote_etag,
+                               urlencode)
 
+from blog import page_cache, sitemaps, stamps, stats
 from blog.forms import ProfileForm, CommentForm, PostForm
-from blog.models import Post, Category, Profile, Comment
-from blogicum.settings import COUNT_PER_PAGE
+from blog.models import (PUBLISHED_POSTS, AuthorStats, Post, Category, Profile,
+                         Comment)
+from blog.paginators import CursorPaginator, InvalidCursor
+from blog.routers import primary_reads
+from blog.search import SearchResults, search_ids
+from blogicum.settings import COMMENTS_PER_PAGE, COUNT_PER_PAGE
+from blogicum.sqlite_backend.pool import pool_metrics
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
@@ -19,80 +34,348 @@ class OnlyAuthorMixin(UserPassesTestMixin):
         return object.author == self.request.user
 
 
-class IndexListView(ListView):
+class ConditionalPageMixin(ABC):
+    """Отвечает 304 Not Modified, пока страница не менялась.
+
+    ETag и Last-Modified строятся по отметке изменений страницы из БД
+    (get_change_stamp(), см. blog.stamps), а для авторизованного
+    читателя — ещё и по его имени и сессии. Отметка — несколько MAX() по
+    индексу updated_at, они идут до запроса списка и рендера шаблона.
+    """
+
+    @abstractmethod
+    def get_change_stamp(self):
+        """Самое позднее updated_at среди того, что показано на странице."""
+
+    def get_validators(self):
+        parts = []
+        user = self.request.user
+        if user.is_authenticated:
+            # Шапка страницы зависит от пользователя, формы — от CSRF-токена,
+            # который меняется при входе вместе с сессией.
+            parts = [user.pk, user.username, user.get_full_name(),
+                     self.request.session.session_key or '']
+        etag, last_modified = stamps.validators(
+            self.get_change_stamp(), *parts)
+        return quote_etag(etag), last_modified
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.setdefault('Last-Modified', http_date(last_modified))
+            # Без проверки у сервера браузер не должен показывать копию.
+            patch_cache_control(
+                response, no_cache=True,
+                private=request.user.is_authenticated)
+        return response
+
+
+class AnonymousPageCacheMixin(ABC):
+    """Отдаёт анонимным читателям готовый HTML из кеша страниц.
+
+    Ключ строится по пути, параметрам пагинации и версии тега страницы,
+    поэтому попадание в кеш не обращается к ORM. Стоит в MRO перед
+    ConditionalPageMixin: его ETag и Last-Modified хранятся вместе со
+    страницей и на попадании проверяются без запроса отметки. Промах
+    читает с основной базы: версия тега уже новая, а отстающая реплика
+    сохранила бы под ней старую страницу.
+    """
+
+    @abstractmethod
+    def get_page_cache_tag(self):
+        """Тег страницы в blog.page_cache: по нему страница сбрасывается."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+        key = page_cache.cache_key(request, self.get_page_cache_tag())
+        response = page_cache.get_response(key)
+        if response is not None:
+            # Валидаторы сохранены вместе со страницей: 304 на попадание
+            # тоже отдаётся без БД.
+            return get_conditional_response(
+                request, etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')),
+                response=response)
+        with primary_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.add_post_render_callback(
+                    lambda rendered: self.store_page(key, rendered))
+            # Шаблон читает из базы при рендеринге: рендерим здесь же.
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+    def store_page(self, key, response):
+        # Куки ответа в кеш не попадают, а вот CSRF-токен, выведенный
+        # в шаблоне, у каждого посетителя свой — такую страницу не храним.
+        if not self.request.META.get('CSRF_COOKIE_USED'):
+            page_cache.store_response(key, response)
+
+
+class CursorPaginationMixin:
+    cursor_ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        use_cursor = after or before or (
+            'page' not in self.request.GET
+            and settings.PAGINATION_MODE == 'cursor'
+        )
+        if not use_cursor:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        try:
+            page = paginator.page(after=after, before=before)
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+def get_visible_post(user, pk):
+    """Пост, который пользователь может открыть, одним запросом: автор
+    видит свои неопубликованные посты, остальные — только опубликованные.
+    """
+    visible = PUBLISHED_POSTS
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return get_object_or_404(
+        Post.objects.select_related('author', 'category', 'location')
+        .filter(visible), pk=pk)
+
+
+def paginate_comments(post, after=None):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'), COMMENTS_PER_PAGE,
+        ('created_at', 'id'))
+    try:
+        return paginator.page(after=after)
+    except InvalidCursor as error:
+        raise Http404(str(error))
+
+
+class IndexListView(AnonymousPageCacheMixin, ConditionalPageMixin,
+                    CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
     paginate_by = COUNT_PER_PAGE
 
+    def get_page_cache_tag(self):
+        return page_cache.INDEX_TAG
+
+    def get_change_stamp(self):
+        return stamps.page_changed_at(Post.objects)
+
     def get_queryset(self):
-        posts = Post.published.annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
-        return posts
+        return Post.published.order_by('-pub_date', '-id')
 
 
-class PostDetailView(DetailView):
+class PostDetailView(AnonymousPageCacheMixin, ConditionalPageMixin,
+                     DetailView):
     model = Post
     template_name = 'blog/detail.html'
 
+    def get_page_cache_tag(self):
+        return page_cache.post_page_tag(self.kwargs.get('pk'))
+
+    def get_change_stamp(self):
+        # Правки комментариев отмечаются в updated_at публикации.
+        return stamps.page_changed_at(
+            Post.objects.filter(pk=self.kwargs.get('pk')))
+
     def get_object(self):
-        post = get_object_or_404(Post, pk=self.kwargs.get('pk'))
-        if post.author == self.request.user:
-            return post
-        return get_object_or_404(Post.published.filter(
-            pk=self.kwargs.get('pk')))
+        return get_visible_post(self.request.user, self.kwargs.get('pk'))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = paginate_comments(self.object)
         return context
 
 
-class CategoryPostsListView(ListView):
+class PostCommentsView(AnonymousPageCacheMixin, ConditionalPageMixin,
+                       DetailView):
+    """Следующая страница комментариев поста — HTML-фрагмент для
+    подгрузки на странице поста.
+    """
+
+    model = Post
+    template_name = 'includes/comment_list.html'
+
+    def get_page_cache_tag(self):
+        return page_cache.post_page_tag(self.kwargs.get('pk'))
+
+    def get_change_stamp(self):
+        # Правки комментариев отмечаются в updated_at публикации.
+        return stamps.page_changed_at(
+            Post.objects.filter(pk=self.kwargs.get('pk')))
+
+    def get_object(self):
+        return get_visible_post(self.request.user, self.kwargs.get('pk'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = paginate_comments(
+            self.object, self.request.GET.get('after'))
+        return context
+
+
+class CategoryPostsListView(AnonymousPageCacheMixin, ConditionalPageMixin,
+                            CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/category.html'
     paginate_by = COUNT_PER_PAGE
     slug_url_kwarg = 'category_slug'
 
+    def get_page_cache_tag(self):
+        return page_cache.category_page_tag(self.kwargs.get('category_slug'))
+
+    def get_change_stamp(self):
+        return stamps.page_changed_at(Post.objects.filter(
+            category__slug=self.kwargs.get('category_slug')))
+
+    @cached_property
+    def category(self):
+        return get_object_or_404(Category, is_published=True,
+                                 slug=self.kwargs.get('category_slug'))
+
     def get_queryset(self):
-        category = get_object_or_404(Category, is_published=True,
-                                     slug=self.kwargs.get('category_slug'))
-        return Post.objects.filter(category=category, is_published=True,
-                                   pub_date__lte=timezone.now())
-
-    def get_context_data(self):
-        context = super().get_context_data()
-        category = get_object_or_404(Category,
-                                     slug=self.kwargs.get('category_slug'),
-                                     is_published=True)
-        context['category'] = category
+        return Post.published.filter(category=self.category).order_by(
+            '-pub_date', '-id')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['category'] = self.category
         return context
 
 
-class ShowProfileView(ListView):
+class ShowProfileView(AnonymousPageCacheMixin, ConditionalPageMixin,
+                      CursorPaginationMixin, ListView):
     model = Profile
     template_name = 'blog/profile.html'
     slug_url_kwarg = 'username'
     paginate_by = COUNT_PER_PAGE
 
+    def get_page_cache_tag(self):
+        return page_cache.profile_page_tag(self.kwargs.get('username'))
+
+    def get_change_stamp(self):
+        # Счётчики и поля пользователя в шапке профиля отмечаются
+        # в updated_at статистики (blog.signals.touch_profile_header).
+        username = self.kwargs.get('username')
+        return stamps.page_changed_at(
+            Post.objects.filter(author__username=username),
+            AuthorStats.objects.filter(profile__user__username=username))
+
+    @cached_property
+    def is_owner(self):
+        return self.request.user.username == self.kwargs.get('username')
+
+    @cached_property
+    def author(self):
+        return get_object_or_404(
+            User.objects.select_related('profile__stats'),
+            username=self.kwargs.get('username'))
+
+    @cached_property
+    def author_stats(self):
+        return stats.for_user(self.author)
+
+    @cached_property
+    def post_count(self):
+        # Владелец видит и неопубликованные посты, остальные — нет.
+        if self.is_owner:
+            return self.author_stats.post_count
+        return self.author_stats.published_post_count
+
     def get_queryset(self):
-        user = get_object_or_404(User, username=self.kwargs.get('username'))
-        posts = user.posts.annotate(
-            comment_count=Count('comments')).filter(
-                author=user).order_by('-pub_date')
-        if self.request.user != user:
-            posts = Post.published.all().annotate(
-                comment_count=Count('comments')).filter(
-                    author=user).order_by('-pub_date')
-        return posts
+        if self.is_owner:
+            posts = self.author.posts.select_related('location', 'category')
+        else:
+            posts = Post.published.filter(author=self.author)
+        return posts.order_by('-pub_date', '-id')
+
+    def get_paginator(self, *args, **kwargs):
+        # Число постов уже есть в статистике автора, отдельный COUNT(*)
+        # пагинатору не нужен. Без сохранённой статистики считает сам.
+        paginator = super().get_paginator(*args, **kwargs)
+        if self.author_stats.pk is not None:
+            paginator.count = self.post_count
+        return paginator
 
     def get_context_data(self, *args, **kwargs):
-        user = get_object_or_404(User, username=self.kwargs.get('username'))
         context = super().get_context_data(*args, **kwargs)
-        context['user'] = user
+        context['user'] = self.author
+        context['stats'] = self.author_stats
+        context['post_count'] = self.post_count
+        return context
+
+
+class SearchView(ListView):
+    template_name = 'blog/search.html'
+    paginate_by = COUNT_PER_PAGE
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return SearchResults(Post.published, search_ids(self.query))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['pagination_query'] = urlencode({'q': self.query}) + '&'
         return context
 
 
+class SitemapIndexView(View):
+    def get(self, request):
+        return HttpResponse(
+            sitemaps.cached_index(request.build_absolute_uri('/')[:-1]),
+            content_type='application/xml')
+
+
+class SitemapView(View):
+    def get(self, request, section, number):
+        if (section not in sitemaps.SECTIONS or not sitemaps.SECTIONS[
+                section].get_shard_queryset(number).exists()):
+            raise Http404
+        return StreamingHttpResponse(
+            sitemaps.render_shard(
+                request.build_absolute_uri('/')[:-1], section, number),
+            content_type='application/xml')
+
+
+class DatabaseMetricsView(UserPassesTestMixin, View):
+    """Настройки соединений и метрики пулов для мониторинга."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        pools = pool_metrics()
+        return JsonResponse({
+            alias: {
+                'conn_max_age': connections[alias].settings_dict[
+                    'CONN_MAX_AGE'],
+                'health_checks': connections[alias].settings_dict.get(
+                    'CONN_HEALTH_CHECKS', False),
+                'pool': pools.get(alias),
+            }
+            for alias in connections
+        })
+
+
 class UpdateProfileView(LoginRequiredMixin, UpdateView):
     model = Profile
     form_class = ProfileForm
@@ -57,12 +57,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.ScheduledPublicationMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -71,6 +73,27 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 COUNT_PER_PAGE = 10
 
+# Комментарии под постом: первая страница выводится вместе с постом,
+# следующие подгружаются фрагментами /posts/<pk>/comments/?after=.
+COMMENTS_PER_PAGE = 50
+
+# Сколько последних публикаций отдают RSS/Atom-ленты.
+FEED_ITEMS_COUNT = 20
+
+# Карта сайта (blog.sitemaps): адресов в одном файле (протокол допускает
+# до 50 000), строк за одно чтение из БД и каталог для файлов, которые
+# заранее собирает команда render_sitemaps.
+SITEMAP_URLS_PER_FILE = 10000
+
+SITEMAP_CHUNK_SIZE = 2000
+
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+
+# 'offset' — нумерованные страницы (?page=N), 'cursor' — keyset-пагинация
+# (?after=/?before=) без COUNT(*) и OFFSET. Ссылки ?page=N работают
+# в обоих режимах, курсоры — тоже.
+PAGINATION_MODE = 'offset'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -93,13 +116,120 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Профиль SQLite для продакшена (blogicum.sqlite_backend): журнал WAL —
+# читатели не ждут писателя и наоборот; synchronous=NORMAL в режиме WAL
+# безопасен для целостности и не делает fsync на каждый коммит;
+# mmap_size и cache_size (в КиБ при отрицательном значении) держат
+# горячие страницы в памяти, temp_store — временные таблицы сортировок.
+# Пишущие транзакции берут блокировку сразу (IMMEDIATE) и ждут её до
+# timeout секунд. Ожидание блокировки целиком отдано busy timeout SQLite,
+# повторов (lock_retries) нет: вместе с ними запрос ждал бы timeout на
+# каждую попытку, то есть в lock_retries + 1 раз дольше. Повторы нужны
+# только с коротким timeout, и тогда ожидание складывается из timeout
+# и пауз между попытками.
+# IMMEDIATE действует на любой transaction.atomic(), в том числе без
+# записи, например на форму изменения в админке при GET: такой блок тоже
+# ждёт писателя и сам не пускает других писателей до своего конца. Это
+# плата за отсутствие «database is locked» при переходе от чтения
+# к записи; чтения вне atomic() не затрагиваются.
+# Соединения берутся из пула процесса (pool): не больше max_size
+# одновременно, лишние потоки ждут свободного до timeout секунд.
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'pragmas': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    'pool': {'max_size': 20, 'timeout': 10},
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # Сколько секунд поток держит своё соединение между запросами
+        # (None — без ограничения). С пулом хватает 0: в конце запроса
+        # соединение возвращается в пул открытым и достаётся следующему
+        # запросу любого потока. Постоянные соединения без пула — это
+        # CONN_MAX_AGE > 0 и OPTIONS без 'pool'.
+        'CONN_MAX_AGE': 0,
+        # Перед повторным использованием соединение проверяется SELECT 1.
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Реплики только для чтения (blog.routers): алиасы из DATABASES, между
+# которыми распределяются чтения GET-запросов. Для локальной проверки
+# подойдут копии базы SQLite, их обновляет команда sync_replicas:
+#   DATABASES['replica1'] = {
+#       'ENGINE': 'blogicum.sqlite_backend',
+#       'NAME': BASE_DIR / 'replica1.sqlite3',
+#       'OPTIONS': SQLITE_OPTIONS,
+#       'TEST': {'MIRROR': 'default'},
+#   }
+#   DATABASE_REPLICAS = ['replica1']
+DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает с основной базы.
+REPLICA_STICKY_SECONDS = 15
+
+
+# Кеш страниц для анонимных читателей живёт в отдельном алиасе
+# PAGE_CACHE_ALIAS. Подходит любой бэкенд Django, например:
+#   'django.core.cache.backends.filebased.FileBasedCache' с LOCATION —
+#   каталогом на диске, общим для всех процессов;
+#   'blog.cache_backends.RespCache' с LOCATION '127.0.0.1:6379' —
+#   Redis или любой Redis-совместимый сервер.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+PAGE_CACHE_ALIAS = 'pages'
+
+PAGE_CACHE_TIMEOUT = 10 * 60
+
+# Время жизни отрендеренной карточки поста; карточки с устаревшим ключом
+# не удаляются явно, а вытесняются по этому таймауту.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Поиск: 'fts5' — виртуальная таблица SQLite FTS5, 'memory' — индекс
+# в памяти процесса, 'auto' — FTS5, если SQLite собран с ним. Индекс
+# в памяти годится только для одного процесса: правки из других воркеров
+# в него не попадают, поэтому в продакшене нужна сборка SQLite с FTS5.
+SEARCH_BACKEND = 'auto'
+
+SEARCH_MAX_RESULTS = 500
+
+# Как часто (в секундах) перечитывать из БД срок ближайшей отложенной
+# публикации; между перечитываниями запросы проверяют только кеш.
+SCHEDULER_RECHECK_INTERVAL = 5 * 60
+
+# Качество перекодирования загруженных фото воркером process_images.
+IMAGE_QUALITY = 85
+
+# Уменьшенные копии Post.image (blog.thumbnails): ширины в пикселях
+# и форматы в порядке предпочтения для браузера.
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+
+THUMBNAIL_FORMATS = ('webp', 'jpeg')
+
+THUMBNAIL_QUALITY = 80
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -0,0 +1,168 @@
+"""Бэкенд SQLite с настройкой соединений для продакшена.
+
+Поверх django.db.backends.sqlite3 понимает в OPTIONS:
+    pragmas — PRAGMA, которые выполняются на каждом новом соединении;
+    transaction_mode — 'DEFERRED', 'IMMEDIATE' или 'EXCLUSIVE' для BEGIN
+        в transaction.atomic(). С IMMEDIATE пишущая транзакция берёт
+        блокировку сразу и ждёт её по busy timeout, а не падает с
+        «database is locked» при попытке перейти от чтения к записи.
+        Режим применяется и к atomic() без записи: такой блок тоже ждёт
+        блокировку и держит её до конца. Неизвестный режим отвергается
+        при открытии соединения;
+    lock_retries, lock_retry_delay — сколько раз и с какой начальной
+        паузой (секунды, растёт вдвое) повторять запрос, получивший
+        «database is locked». Повторяется только запрос вне открытой
+        транзакции: внутри неё повтор одного запроса небезопасен. Каждая
+        попытка ждёт ещё и busy timeout, поэтому повторы имеют смысл
+        только с коротким timeout;
+    pool — {'max_size': ..., 'timeout': ...}: соединения берутся из
+        ограниченного пула процесса (blogicum.sqlite_backend.pool), а
+        close() возвращает их туда. Базы в памяти пул не использует.
+Остальные ключи OPTIONS, например timeout (busy timeout в секундах),
+передаются в sqlite3.connect() как обычно.
+
+Ключ CONN_HEALTH_CHECKS в настройках базы (как в Django 4.1) включает
+проверку SELECT 1 перед повторным использованием соединения: и
+постоянного (CONN_MAX_AGE) в начале и конце запроса, и взятого из пула.
+"""
+import time
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+from blogicum.sqlite_backend import pool
+
+BACKEND_OPTIONS = (
+    'pragmas', 'transaction_mode', 'lock_retries', 'lock_retry_delay',
+    'pool')
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    lock_retries = 0
+    lock_retry_delay = 0.05
+
+    def execute(self, query, params=None):
+        return self._retry_locked(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry_locked(super().executemany, query, param_list)
+
+    def _retry_locked(self, method, *args):
+        delay = self.lock_retry_delay
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return method(*args)
+            except Database.OperationalError as error:
+                if (attempt == self.lock_retries
+                        or not is_locked_error(error)
+                        or self.connection.in_transaction):
+                    raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def ping(conn):
+    try:
+        conn.execute('SELECT 1')
+    except Database.Error:
+        return False
+    return True
+
+
+def is_reusable(conn):
+    # Соединение из пула не должно нести чужую незавершённую транзакцию.
+    return ping(conn) and not conn.in_transaction
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Пул, из которого взято текущее соединение.
+    connection_pool = None
+
+    @property
+    def backend_options(self):
+        options = self.settings_dict['OPTIONS']
+        return {key: options[key] for key in BACKEND_OPTIONS
+                if key in options}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for key in BACKEND_OPTIONS:
+            params.pop(key, None)
+        return params
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_pool(self):
+        options = self.backend_options.get('pool')
+        if options is None or self.is_in_memory_db():
+            return None
+        return pool.get_pool(self.alias, self.settings_dict['NAME'],
+                             **options)
+
+    @property
+    def transaction_mode(self):
+        return self.backend_options.get('transaction_mode', 'DEFERRED')
+
+    def get_new_connection(self, conn_params):
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode: {self.transaction_mode}. '
+                f'Допустимы: {", ".join(TRANSACTION_MODES)}.')
+        connection_pool = self.get_pool()
+        if connection_pool is None:
+            return self.connect_tuned(conn_params)
+        conn = connection_pool.checkout(
+            partial(self.connect_tuned, conn_params),
+            check=is_reusable if self.health_checks else None)
+        self.connection_pool = connection_pool
+        return conn
+
+    def connect_tuned(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.backend_options.get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _close(self):
+        connection_pool, self.connection_pool = self.connection_pool, None
+        if connection_pool is None or self.connection is None:
+            return super()._close()
+        # Внутри atomic() Django ещё держит ссылку на соединение, поэтому
+        # отдавать его другому потоку нельзя.
+        discard = self.in_atomic_block
+        if not discard and self.connection.in_transaction:
+            try:
+                self.connection.rollback()
+            except Database.Error:
+                discard = True
+        connection_pool.checkin(self.connection, discard=discard)
+
+    def is_usable(self):
+        return ping(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if (self.health_checks and self.connection is not None
+                and not self.in_atomic_block and not self.is_usable()):
+            self.close()
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        options = self.backend_options
+        cursor.lock_retries = options.get('lock_retries', 0)
+        cursor.lock_retry_delay = options.get(
+            'lock_retry_delay', SQLiteCursorWrapper.lock_retry_delay)
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,207 @@
+"""Ограниченный пул соединений SQLite, общий для всех потоков процесса.
+
+Соединение Django принадлежит потоку: под WSGI — потоку воркера, под
+ASGI — потоку, в котором sync_to_async выполняет синхронный код. Пул
+держит открытые sqlite3-соединения между запросами: close() возвращает
+соединение в пул, и следующий запрос получает уже настроенное, без
+connect() и PRAGMA. Больше max_size соединений одновременно не выдаётся,
+остальные потоки ждут до timeout секунд и получают OperationalError.
+
+Пул помнит, какому потоку выдано соединение. Если поток завершился, не
+вернув его (например, фоновый поток без connection.close()), соединение
+закрывается, а место в пуле освобождается, когда потребуется свободное.
+"""
+import sqlite3
+import threading
+import time
+import weakref
+from collections import Counter, deque
+
+# Как часто ждущий поток проверяет, не освободились ли места завершённых
+# потоков: о них никто не уведомляет.
+ORPHAN_CHECK_INTERVAL = 0.5
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, name, max_size=10, timeout=10):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.stats = Counter()
+        self._idle = deque()
+        # Открытые соединения пула: свободные и выданные.
+        self._size = 0
+        # Выданные соединения: id(conn) -> (conn, weakref на поток).
+        self._owners = {}
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def _available(self):
+        return self._idle or self._size < self.max_size
+
+    def _count(self, key, value=1):
+        with self._condition:
+            self.stats[key] += value
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _reclaim_orphans(self):
+        """Закрывает соединения завершившихся потоков-владельцев."""
+        with self._condition:
+            orphans = []
+            for key, (conn, owner) in list(self._owners.items()):
+                thread = owner()
+                if thread is None or not thread.is_alive():
+                    del self._owners[key]
+                    orphans.append(conn)
+            self._size -= len(orphans)
+            self.stats['reclaimed'] += len(orphans)
+        for conn in orphans:
+            self._close_quietly(conn)
+
+    def _wait_available(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            self._reclaim_orphans()
+            if self._available():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._condition.wait(min(remaining, ORPHAN_CHECK_INTERVAL))
+
+    def _lend(self, conn):
+        with self._condition:
+            self._owners[id(conn)] = (
+                conn, weakref.ref(threading.current_thread()))
+        return conn
+
+    def checkout(self, connect, check=None):
+        """Соединение из пула или новое от connect().
+
+        check(conn) проверяет свободное соединение перед выдачей; не
+        прошедшее проверку закрывается и заменяется новым.
+        """
+        with self._condition:
+            self.stats['checkouts'] += 1
+            if not self._available():
+                self._reclaim_orphans()
+            if not self._available():
+                self.stats['waits'] += 1
+                started = time.monotonic()
+                ready = self._wait_available()
+                self.stats['wait_seconds'] += time.monotonic() - started
+                if not ready:
+                    self.stats['timeouts'] += 1
+                    raise sqlite3.OperationalError(
+                        f'Пул соединений исчерпан: все {self.max_size} '
+                        f'заняты дольше {self.timeout} с.')
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._size += 1
+        if conn is not None and check is not None and not check(conn):
+            self._count('health_check_failures')
+            self._close_quietly(conn)
+            conn = None
+        if conn is not None:
+            self._count('reused')
+            return self._lend(conn)
+        try:
+            conn = connect()
+        except Exception:
+            self._count('errors')
+            self._release_slot()
+            raise
+        self._count('created')
+        return self._lend(conn)
+
+    def checkin(self, conn, discard=False):
+        """Возвращает соединение в пул; discard=True закрывает его.
+
+        Соединение, которое пул уже забрал у завершившегося потока или
+        выдал до закрытия пула, просто закрывается.
+        """
+        with self._condition:
+            lent = self._owners.pop(id(conn), None) is not None
+            if lent and not discard and not self.closed:
+                self._idle.append(conn)
+                self._condition.notify()
+                return
+        if lent:
+            self._count('discarded')
+            self._release_slot()
+        self._close_quietly(conn)
+
+    def close(self):
+        """Закрывает пул: свободные соединения сразу, выданные — когда
+        их вернут.
+        """
+        with self._condition:
+            self.closed = True
+        self.close_idle()
+
+    def close_idle(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            self._count('errors')
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'name': self.name,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **{key: self.stats[key] for key in (
+                    'checkouts', 'created', 'reused', 'waits', 'timeouts',
+                    'health_check_failures', 'discarded', 'reclaimed',
+                    'errors')},
+                'wait_seconds': round(self.stats['wait_seconds'], 6),
+            }
+
+
+def get_pool(alias, name, max_size=10, timeout=10):
+    """Пул алиаса базы; при смене файла базы старый пул закрывается, и
+    выданные из него соединения закрываются при возврате.
+    """
+    name = str(name)
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is not None and pool.name == name:
+            return pool
+        _pools[alias] = new_pool = ConnectionPool(name, max_size, timeout)
+    if pool is not None:
+        pool.close()
+    return new_pool
+
+
+def pool_metrics():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.metrics() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """Закрывает свободные соединения всех пулов, например при выходе."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
@@ -7,10 +7,18 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
+import atexit
 import os
 
 from django.core.wsgi import get_wsgi_application
 
+from blogicum.sqlite_backend.pool import close_pools
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Соединения пула (blogicum.sqlite_backend.pool) общие для потоков
+# процесса; при остановке воркера свободные закрываются, и SQLite
+# переносит журнал WAL в файл базы.
+atexit.register(close_pools)
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,15 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -93,6 +103,7 @@ pytest_plugins = [
     "fixtures.categories",
     "fixtures.comments",
     "adapters.comment",
+    "fixtures.query_budget",
 ]
 
 
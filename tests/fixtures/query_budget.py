@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from typing import Dict, List
+
+import pytest
+from django.core.signals import request_started
+from django.db import connections, reset_queries
+from django.test.client import Client
+from django.urls import Resolver404
+
+# Сколько SQL-запросов может выполнить один GET-запрос к странице.
+# Бюджет считается на весь запрос целиком: в него входят загрузка сессии
+# и пользователя (2 запроса для авторизованного клиента), однократный
+# перерасчёт срока ближайшей отложенной публикации на холодном кеше и
+# отметка изменений страницы для условного GET (1 запрос, blog.stamps).
+# Запросы, число которых растёт с размером страницы (N+1), сразу
+# выводят страницу за пределы бюджета. Считаются запросы ко всем базам
+# (основной и репликам), а не только к default.
+QUERY_BUDGETS: Dict[str, int] = {
+    "blog:index": 7,
+    "blog:category_posts": 7,
+    "blog:profile": 6,
+    "blog:post_detail": 6,
+    "blog:post_comments": 6,
+    "blog:search": 7,
+}
+
+
+@contextmanager
+def capture_all_queries():
+    """Собирает в список запросы ко всем алиасам DATABASES.
+
+    В отличие от CaptureQueriesContext не открывает соединения: алиас,
+    к которому страница не обращалась, просто не даёт запросов.
+    """
+    captured: List[dict] = []
+    states = []
+    for conn in connections.all():
+        states.append((conn, conn.force_debug_cursor, len(conn.queries_log)))
+        conn.force_debug_cursor = True
+    # Иначе начало запроса очистит queries_log, как в CaptureQueriesContext.
+    request_started.disconnect(reset_queries)
+    try:
+        yield captured
+    finally:
+        request_started.connect(reset_queries)
+        for conn, force_debug_cursor, start in states:
+            conn.force_debug_cursor = force_debug_cursor
+            captured.extend(
+                {**query, "alias": conn.alias}
+                for query in list(conn.queries_log)[start:]
+            )
+
+
+def _format_failure(view_name, url, budget, queries):
+    statements = "\n".join(
+        f"  {number}. [{query['alias']}] {query['sql']}"
+        for number, query in enumerate(queries, start=1)
+    )
+    return (
+        f"Страница `{view_name}` ({url}) выполнила {len(queries)} SQL-запросов"
+        f" при бюджете {budget}:\n{statements}"
+    )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request, monkeypatch):
+    budgets = dict(QUERY_BUDGETS)
+    for marker in request.node.iter_markers("query_budget"):
+        budgets.update(marker.kwargs)
+    if request.node.get_closest_marker("no_query_budget"):
+        budgets.clear()
+    original_request = Client.request
+
+    def budgeted_request(self, **kwargs):
+        if kwargs.get("REQUEST_METHOD") != "GET":
+            return original_request(self, **kwargs)
+        with capture_all_queries() as queries:
+            response = original_request(self, **kwargs)
+        try:
+            view_name = response.resolver_match.view_name
+        except Resolver404:
+            return response
+        budget = budgets.get(view_name)
+        if budget is not None and len(queries) > budget:
+            pytest.fail(
+                _format_failure(
+                    view_name, kwargs.get("PATH_INFO"), budget, queries
+                ),
+                pytrace=False,
+            )
+        return response
+
+    monkeypatch.setattr(Client, "request", budgeted_request)
+    return budgets
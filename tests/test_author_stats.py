@@ -0,0 +1,110 @@
+from importlib import import_module
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+from blog.models import AuthorStats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stats(user):
+    return AuthorStats.objects.get(profile__user=user)
+
+
+def _counts(user):
+    stats = _stats(user)
+    return (stats.post_count, stats.published_post_count, stats.comment_count)
+
+
+def test_signals_keep_stats_current(
+        mixer, user, another_user, published_category
+):
+    unpublished_category = mixer.blend("blog.Category", is_published=False)
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category)
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=unpublished_category)
+    comment = mixer.blend("blog.Comment", author=user, post=posts[0])
+    assert _counts(user) == (4, 3, 1), (
+        "Убедитесь, что статистика автора обновляется при создании постов"
+        " и комментариев."
+    )
+    assert _stats(user).last_activity == comment.created_at
+
+    posts[1].is_published = False
+    posts[1].save()
+    unpublished_category.is_published = True
+    unpublished_category.save()
+    assert _counts(user) == (4, 3, 1)
+
+    comment.delete()
+    hidden.delete()
+    assert _counts(user) == (3, 2, 0), (
+        "Убедитесь, что статистика автора обновляется при удалении постов"
+        " и комментариев."
+    )
+
+    another_user.delete()
+    user.delete()
+    assert not AuthorStats.objects.exists()
+
+
+def test_rebuild_command_matches_incremental(
+        mixer, user, another_user, published_category
+):
+    posts = mixer.cycle(4).blend(
+        "blog.Post", author=mixer.sequence(user, another_user),
+        category=published_category)
+    mixer.cycle(5).blend("blog.Comment", author=another_user, post=posts[0])
+    expected = {u.pk: _counts(u) for u in (user, another_user)}
+    AuthorStats.objects.update(
+        post_count=0, published_post_count=0, comment_count=0)
+
+    call_command("rebuild_author_stats", stdout=open("/dev/null", "w"))
+    assert {u.pk: _counts(u) for u in (user, another_user)} == expected
+
+
+def test_profile_header_shows_stats(mixer, user, client, published_category):
+    mixer.cycle(2).blend("blog.Post", author=user, category=published_category)
+    content = client.get(f"/profile/{user.username}/").content.decode()
+    assert "Публикаций: 2" in content, (
+        "Убедитесь, что в шапке профиля выводится число публикаций автора."
+    )
+    assert "Комментариев: 0" in content
+
+
+# Показ профиля не пишет в базу: без строки статистики в шапке нули,
+# а список постов всё равно полный.
+@pytest.mark.no_query_budget
+def test_profile_without_stats_is_read_only(
+        mixer, user, client, published_category
+):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category)
+    AuthorStats.objects.all().delete()
+    response = client.get(f"/profile/{user.username}/")
+    assert not AuthorStats.objects.exists(), (
+        "Убедитесь, что показ профиля не создаёт строку статистики."
+    )
+    assert "Публикаций: 0" in response.content.decode()
+    assert {post.pk for post in response.context["page_obj"]} == {
+        post.pk for post in posts}, (
+        "Убедитесь, что без статистики профиль показывает все посты автора."
+    )
+    assert "primary_db" not in response.cookies
+
+
+def test_migration_backfills_missing_stats(mixer, user, published_category):
+    mixer.cycle(2).blend("blog.Post", author=user, category=published_category)
+    AuthorStats.objects.all().delete()
+    migration = import_module("blog.migrations.0015_backfill_author_stats")
+    state = MigrationLoader(connection).project_state(
+        ("blog", "0015_backfill_author_stats"))
+    migration.fill_author_stats(state.apps, None)
+    assert _counts(user) == (2, 2, 0), (
+        "Убедитесь, что миграция заполняет статистику уже существующих"
+        " авторов."
+    )
@@ -0,0 +1,132 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+
+from blog import bulk_import, page_cache, stats
+from blog.models import AuthorStats, Comment, Post
+from blog.search import search_ids
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _fixture(user_pk=900, post_pk=900):
+    return [
+        {"model": "auth.user", "pk": user_pk, "fields": {
+            "username": f"imported{user_pk}", "password": "!",
+            "date_joined": "2022-12-18T22:57:29Z"}},
+        {"model": "blog.category", "pk": 900, "fields": {
+            "title": "Импорт", "description": "Из фикстуры",
+            "slug": "imported", "is_published": True,
+            "created_at": "2022-12-18T23:00:00Z"}},
+        {"model": "blog.post", "pk": post_pk, "fields": {
+            "title": "Загруженный пост", "text": "Текст про маяк",
+            "pub_date": "2022-12-19T00:00:00Z", "author": user_pk,
+            "category": 900, "is_published": True,
+            "created_at": "2022-12-18T23:06:18Z"}},
+        {"model": "blog.comment", "pk": 900, "fields": {
+            "text": "Комментарий", "post": post_pk, "author": user_pk,
+            "created_at": "2022-12-20T10:00:00Z"}},
+    ]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_import_streams_fixture(tmp_path, monkeypatch, suffix):
+    # Маленькие куски чтения проверяют объекты на границах кусков.
+    monkeypatch.setattr(bulk_import, "READ_SIZE", 7)
+    path = tmp_path / f"data{suffix}"
+    if suffix == ".json":
+        path.write_text(json.dumps(_fixture(), indent=2, ensure_ascii=False))
+    else:
+        path.write_text("\n".join(
+            json.dumps(obj, ensure_ascii=False) for obj in _fixture()))
+    call_command("import_fixture", str(path), chunk_size=2, stdout=StringIO())
+
+    post = Post.objects.get(pk=900)
+    assert post.created_at.year == 2022, (
+        "Убедитесь, что импорт сохраняет даты из фикстуры."
+    )
+    assert post in Post.published.all()
+    assert post.comment_count == 1
+    assert AuthorStats.objects.get(profile__user_id=900).post_count == 1
+    assert search_ids("маяк") == [900]
+
+
+def test_remap_assigns_new_ids(tmp_path, post_with_published_location):
+    existing = post_with_published_location
+    # id поста и категории уже заняты в базе, автор — существующий.
+    objects = _fixture(user_pk=existing.author_id, post_pk=existing.pk)[1:]
+    objects[0]["pk"] = objects[1]["fields"]["category"] = (
+        existing.category_id)
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(objects))
+    call_command("import_fixture", str(path), remap=True, stdout=StringIO())
+
+    post = Post.objects.get(title="Загруженный пост")
+    assert post.pk != existing.pk
+    assert post.category.slug == "imported", (
+        "Убедитесь, что ссылки внутри фикстуры переводятся на новые id."
+    )
+    assert post.author == existing.author
+    assert Comment.objects.get(text="Комментарий").post == post
+
+
+def test_ignore_conflicts_counts_only_inserted_rows(
+        tmp_path, post_with_published_location
+):
+    existing = post_with_published_location
+    objects = _fixture()
+    duplicate = json.loads(json.dumps(objects[2]))
+    duplicate["pk"] = existing.pk
+    duplicate["fields"]["text"] = "Текст про айсберг"
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps([*objects, duplicate]))
+    output = StringIO()
+    call_command(
+        "import_fixture", str(path), ignore_conflicts=True, stdout=output)
+
+    assert "blog.Post: 1\n" in output.getvalue(), (
+        "Убедитесь, что пропущенные при ignore_conflicts строки не"
+        " попадают в счётчики импорта."
+    )
+    assert search_ids("айсберг") == [], (
+        "Убедитесь, что пропущенные строки не попадают в поисковый индекс."
+    )
+    assert search_ids("маяк") == [900]
+
+
+def test_import_purges_pages_without_clearing_caches(tmp_path, client):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(_fixture()))
+    client.get("/")
+    caches["default"].set("unrelated", 1)
+    before = page_cache.page_digest(page_cache.INDEX_TAG)
+    call_command("import_fixture", str(path), stdout=StringIO())
+
+    assert page_cache.page_digest(page_cache.INDEX_TAG) != before, (
+        "Убедитесь, что импорт сбрасывает кеш страниц версией общего тега."
+    )
+    assert caches["default"].get("unrelated") == 1, (
+        "Убедитесь, что импорт не очищает кеши целиком."
+    )
+    assert "Загруженный пост" in client.get("/").content.decode()
+
+
+def test_rebuild_binds_ids_in_batches(monkeypatch, user):
+    monkeypatch.setattr(stats, "BATCH_SIZE", 3)
+    sizes = []
+
+    def record(execute, sql, params, many, context):
+        sizes.append(len(params or ()))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        rebuilt = stats.rebuild([user.pk, *range(10 ** 6, 10 ** 6 + 50)])
+
+    assert rebuilt == 1
+    assert max(sizes) < 10, (
+        "Убедитесь, что rebuild передаёт список id в запросы пачками."
+    )
@@ -0,0 +1,91 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count(post):
+    return Post.objects.values_list("comment_count", flat=True).get(
+        pk=post.pk)
+
+
+def test_comment_count_follows_create_and_delete(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    assert _count(post) == 4, (
+        "Убедитесь, что `Post.comment_count` увеличивается при создании"
+        " комментария."
+    )
+    comments[0].delete()
+    assert _count(post) == 3
+    another_user.delete()
+    assert _count(post) == 2, (
+        "Убедитесь, что `Post.comment_count` уменьшается при каскадном"
+        " удалении комментариев."
+    )
+
+
+def test_recount_comments_repairs_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=10)
+    call_command("recount_comments")
+    assert _count(post) == Comment.objects.filter(post=post).count() == 2
+
+
+def test_recount_comments_is_one_update(mixer, user, published_category):
+    mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category)
+    Post.objects.update(comment_count=7)
+    with CaptureQueriesContext(connection) as context:
+        call_command("recount_comments", stdout=StringIO())
+    assert len(context.captured_queries) == 1, (
+        "Убедитесь, что пересчёт идёт одним UPDATE, без списка id, который"
+        " растёт с числом расхождений."
+    )
+    assert not Post.objects.exclude(comment_count=0).exists()
+
+
+def test_post_cascade_skips_comment_count_updates(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as context:
+        post.delete()
+    assert not [
+        query for query in context.captured_queries
+        if "comment_count" in query["sql"]
+        and query["sql"].startswith('UPDATE "blog_post"')
+    ], (
+        "Убедитесь, что при удалении поста его комментарии не обновляют"
+        " счётчик удаляемого поста."
+    )
+    mixer.blend("blog.Comment", post=mixer.blend(
+        "blog.Post", author=post.author, category=post.category))
+    Comment.objects.get().delete()
+    assert not Post.objects.exclude(comment_count=0).exists()
+
+
+def test_post_save_reads_previous_state_once(post_with_published_location):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as context:
+        post.save()
+    sqls = [query["sql"] for query in context.captured_queries]
+    update = next(
+        i for i, sql in enumerate(sqls) if sql.startswith('UPDATE "blog_post"'))
+    assert len([
+        sql for sql in sqls[:update] if 'FROM "blog_post"' in sql
+    ]) == 1, (
+        "Убедитесь, что прежнее состояние поста читается одним запросом."
+    )
@@ -0,0 +1,69 @@
+import pytest
+
+from blog.paginators import encode_cursor
+
+pytestmark = [pytest.mark.django_db]
+
+PER_PAGE = 5
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(PER_PAGE * 2 + 2).blend(
+        "blog.Comment", post=post_with_published_location,
+        text=mixer.sequence("Комментарий №{0}"),
+    )
+
+
+def test_first_page_inline_and_rest_in_fragments(
+        monkeypatch, client, post_with_published_location, many_comments
+):
+    monkeypatch.setattr("blog.views.COMMENTS_PER_PAGE", PER_PAGE)
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    page = response.context["comments"]
+    assert [c.id for c in page] == [c.id for c in many_comments[:PER_PAGE]], (
+        "Убедитесь, что на странице поста выводится первая страница"
+        " комментариев в порядке их создания."
+    )
+    assert page.has_next()
+
+    seen = [c.id for c in page]
+    url = (f"/posts/{post_with_published_location.id}/comments/"
+           f"?after={page.next_cursor}")
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        fragment = response.context["comments"]
+        assert len(fragment) <= PER_PAGE
+        seen += [c.id for c in fragment]
+        content = response.content.decode()
+        assert "<html" not in content, (
+            "Убедитесь, что следующие страницы комментариев отдаются"
+            " HTML-фрагментом без базового шаблона."
+        )
+        url = fragment.has_next() and (
+            f"/posts/{post_with_published_location.id}/comments/"
+            f"?after={fragment.next_cursor}")
+    assert seen == [c.id for c in many_comments]
+
+
+def test_fragment_respects_post_visibility(
+        client, post_with_published_location, many_comments
+):
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    response = client.get(
+        f"/posts/{post_with_published_location.id}/comments/")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("token", [
+    "мусор",
+    encode_cursor([1, 1]),
+    encode_cursor(["2024-01-01T00:00:00+00:00", 2 ** 63]),
+])
+def test_invalid_cursor_is_404(client, post_with_published_location, token):
+    response = client.get(
+        f"/posts/{post_with_published_location.id}/comments/",
+        {"after": token})
+    assert response.status_code == 404
@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from blog import stamps
+from blog.models import AuthorStats, Category, Location, Post
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _urls(post):
+    return [
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ]
+
+
+@pytest.mark.parametrize("logged_in", [False, True])
+def test_unchanged_pages_are_not_modified(
+        unlogged_client, another_user_client, post_with_published_location,
+        logged_in
+):
+    client = another_user_client if logged_in else unlogged_client
+    for url in _urls(post_with_published_location):
+        first = client.get(url)
+        assert first.has_header("ETag") and first.has_header(
+            "Last-Modified"), url
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == 304, (
+            "Убедитесь, что страницы блога отвечают 304 Not Modified, если"
+            " клиент прислал актуальный ETag."
+        )
+        # Только отметки изменений, без запроса списка.
+        assert all(
+            "MAX(" in query["sql"] for query in context.captured_queries
+            if "blog_" in query["sql"]
+        ), context.captured_queries
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert response.status_code == 304, url
+
+
+def test_changes_invalidate_validators(
+        mixer, unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    etags = {url: unlogged_client.get(url)["ETag"] for url in _urls(post)}
+    mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+    for url, etag in etags.items():
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, url
+
+    etag = unlogged_client.get(f"/category/{post.category.slug}/")["ETag"]
+    post.category.title = "Новое название"
+    post.category.save()
+    response = unlogged_client.get(
+        f"/category/{post.category.slug}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+def test_validators_depend_on_reader(
+        user, user_client, unlogged_client, post_of_another_author
+):
+    url = f"/posts/{post_of_another_author.id}/"
+    anonymous_etag = unlogged_client.get(url)["ETag"]
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=anonymous_etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что авторизованный пользователь не получает 304"
+        " по ETag страницы, показанной анонимному читателю."
+    )
+    etag = response["ETag"]
+    user.first_name = "Новое имя"
+    user.save()
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_validators_do_not_depend_on_cache(
+        unlogged_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = unlogged_client.get(url)["ETag"]
+    # Кеш процесса не общий: другой воркер не видит его версий.
+    for cache in caches.all():
+        cache.clear()
+    assert unlogged_client.get(
+        url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+        "Убедитесь, что ETag строится по данным БД, а не по кешу процесса."
+    )
+
+
+def test_last_modified_does_not_go_back(
+        mixer, unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    newest = mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        location=post.location, pub_date=post.pub_date)
+    # Last-Modified точен до секунды: состарим отметки на час.
+    hour_ago = timezone.now() - timedelta(hours=1)
+    for model in (Post, Category, Location, AuthorStats):
+        model.objects.update(updated_at=hour_ago)
+    urls = ["/", f"/category/{post.category.slug}/",
+            f"/profile/{post.author.username}/"]
+    before = {url: unlogged_client.get(url)["Last-Modified"] for url in urls}
+    newest.delete()
+    for url in urls:
+        response = unlogged_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=before[url])
+        assert response.status_code == 200, url
+        assert parse_http_date(response["Last-Modified"]) > parse_http_date(
+            before[url]), (
+            "Убедитесь, что после удаления публикации Last-Modified"
+            " страницы растёт."
+        )
+
+
+def test_profile_header_changes_invalidate_validators(
+        another_user_client, post_with_published_location
+):
+    author = post_with_published_location.author
+    url = f"/profile/{author.username}/"
+    AuthorStats.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+    etag = another_user_client.get(url)["ETag"]
+    author.first_name = "Новое имя"
+    author.save()
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что смена имени пользователя меняет ETag его профиля."
+    )
+
+
+def test_stamp_without_categories(mixer, user):
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    post = mixer.blend("blog.Post", author=user, category=None,
+                       location=None)
+    assert stamps.page_changed_at(Post.objects) == post.updated_at, (
+        "Убедитесь, что отметка страницы не зависит от того, есть ли в базе"
+        " категории."
+    )
@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+
+import pytest
+from django.db import OperationalError, connection
+
+from blogicum.sqlite_backend import pool
+from blogicum.sqlite_backend.base import DatabaseWrapper
+
+pytestmark = [pytest.mark.django_db]
+
+ALIAS = "pooled"
+
+
+@pytest.fixture
+def open_database(tmp_path):
+    wrappers = []
+
+    def open_database(**settings):
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": str(tmp_path / "db.sqlite3"),
+            "OPTIONS": {
+                **connection.settings_dict["OPTIONS"],
+                "pool": {"max_size": 1, "timeout": 0.05},
+            },
+            "CONN_HEALTH_CHECKS": True,
+            **settings,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=ALIAS)
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield open_database
+    for wrapper in wrappers:
+        wrapper.close()
+    pool.close_pools()
+
+
+def test_closed_connection_returns_to_pool(open_database):
+    first, second = open_database(), open_database()
+    first.ensure_connection()
+    raw = first.connection
+    first.close()
+    second.ensure_connection()
+    assert second.connection is raw, (
+        "Убедитесь, что close() возвращает соединение в пул, а следующее "
+        "подключение берёт его оттуда."
+    )
+    metrics = pool.pool_metrics()[ALIAS]
+    assert metrics["checkouts"] == 2
+    assert metrics["created"] == 1
+    assert metrics["reused"] == 1
+    assert metrics["in_use"] == 1
+
+
+def test_pool_is_bounded(open_database):
+    holder, waiting = open_database(), open_database()
+    holder.ensure_connection()
+    with pytest.raises(OperationalError, match="Пул соединений исчерпан"):
+        waiting.ensure_connection()
+    metrics = pool.pool_metrics()[ALIAS]
+    assert metrics["waits"] == 1, (
+        "Убедитесь, что при занятом пуле подключение ждёт соединение."
+    )
+    assert metrics["timeouts"] == 1
+    assert metrics["size"] == 1
+
+
+def test_broken_connection_is_replaced(open_database):
+    first, second = open_database(), open_database()
+    first.ensure_connection()
+    raw = first.connection
+    first.close()
+    raw.close()
+    with second.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    assert second.connection is not raw, (
+        "Убедитесь, что соединение из пула проверяется перед выдачей."
+    )
+    assert pool.pool_metrics()[ALIAS]["health_check_failures"] == 1
+
+
+def test_persistent_connection_is_health_checked(open_database):
+    database = open_database(CONN_MAX_AGE=60, OPTIONS={})
+    database.ensure_connection()
+    database.close_if_unusable_or_obsolete()
+    assert database.connection is not None, (
+        "Убедитесь, что исправное постоянное соединение не закрывается."
+    )
+    database.connection.close()
+    database.close_if_unusable_or_obsolete()
+    assert database.connection is None, (
+        "Убедитесь, что неисправное постоянное соединение закрывается."
+    )
+
+
+def test_metrics_are_staff_only(client, admin_client):
+    assert client.get("/metrics/db/").status_code != 200
+    response = admin_client.get("/metrics/db/")
+    assert response.status_code == 200
+    assert "default" in response.json(), (
+        "Убедитесь, что метрики показывают настройки соединений баз."
+    )
+
+
+def test_slot_of_finished_thread_is_reclaimed(tmp_path):
+    connection_pool = pool.ConnectionPool(
+        str(tmp_path / "db.sqlite3"), max_size=1, timeout=0.05)
+
+    def connect():
+        return sqlite3.connect(
+            tmp_path / "db.sqlite3", check_same_thread=False)
+
+    leaked = []
+    worker = threading.Thread(
+        target=lambda: leaked.append(connection_pool.checkout(connect)))
+    worker.start()
+    worker.join()
+    conn = connection_pool.checkout(connect)
+    assert conn is not leaked[0], (
+        "Убедитесь, что место соединения, не возвращённого завершившимся "
+        "потоком, освобождается."
+    )
+    with pytest.raises(sqlite3.ProgrammingError):
+        leaked[0].execute("SELECT 1")
+    metrics = connection_pool.metrics()
+    assert metrics["reclaimed"] == 1
+    assert metrics["size"] == 1
+    connection_pool.checkin(conn)
+    connection_pool.close_idle()
+
+
+def test_connection_of_replaced_pool_is_closed(open_database, tmp_path):
+    first = open_database()
+    first.ensure_connection()
+    raw, old_pool = first.connection, first.connection_pool
+    moved = open_database(NAME=str(tmp_path / "moved.sqlite3"))
+    moved.ensure_connection()
+    first.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        raw.execute("SELECT 1")
+    assert old_pool.metrics()["size"] == 0, (
+        "Убедитесь, что соединение, возвращённое в заменённый пул, "
+        "закрывается, а не остаётся в нём."
+    )
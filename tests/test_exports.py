@@ -0,0 +1,58 @@
+import csv
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_export_command_writes_fixture_lines(
+        tmp_path, mixer, post_with_published_location
+):
+    old_post = post_with_published_location
+    since = timezone.now()
+    new_post = mixer.blend(
+        "blog.Post", author=old_post.author, category=old_post.category)
+    mixer.blend("blog.Comment", post=new_post, author=old_post.author)
+
+    call_command(
+        "export_blog", "post", "comment", output=tmp_path, gzip=True,
+        since=since.isoformat(), stdout=StringIO())
+    with gzip.open(tmp_path / "post.jsonl.gz", "rt") as file:
+        posts = [json.loads(line) for line in file]
+    assert [post["pk"] for post in posts] == [new_post.pk], (
+        "Убедитесь, что --since выгружает только изменённые строки."
+    )
+    assert posts[0]["model"] == "blog.post"
+    assert posts[0]["fields"]["title"] == new_post.title
+    assert posts[0]["fields"]["author"] == new_post.author_id
+
+    # Выгрузка загружается обратно командой import_fixture.
+    Post.objects.filter(pk=new_post.pk).delete()
+    call_command(
+        "import_fixture", str(tmp_path / "post.jsonl.gz"),
+        str(tmp_path / "comment.jsonl.gz"), stdout=StringIO())
+    assert Comment.objects.get(post_id=new_post.pk).post.title == (
+        new_post.title)
+
+
+def test_admin_action_streams_csv(
+        admin_client, post_with_published_location
+):
+    response = admin_client.post("/admin/blog/post/", {
+        "action": "export_csv",
+        "_selected_action": [post_with_published_location.pk],
+    })
+    assert response.status_code == 200
+    assert response.streaming
+    rows = list(csv.DictReader(StringIO(
+        b"".join(response.streaming_content).decode())))
+    assert [row["title"] for row in rows] == [
+        post_with_published_location.title]
+    assert rows[0]["author_id"] == str(post_with_published_location.author_id)
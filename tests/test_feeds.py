@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from blog.models import AuthorStats, Category, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_urls(post_with_published_location):
+    post = post_with_published_location
+    return [
+        "/feed/",
+        "/feed/atom/",
+        f"/category/{post.category.slug}/feed/",
+        f"/category/{post.category.slug}/feed/atom/",
+        f"/profile/{post.author.username}/feed/",
+        f"/profile/{post.author.username}/feed/atom/",
+    ]
+
+
+def test_feeds_list_visible_posts(
+        client, feed_urls, post_with_published_location,
+        unpublished_posts_with_published_locations
+):
+    for url in feed_urls:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        assert "xml" in response["Content-Type"]
+        content = response.content.decode()
+        assert post_with_published_location.title in content, url
+        for hidden in unpublished_posts_with_published_locations:
+            assert hidden.title not in content, url
+
+
+def test_unchanged_feed_is_not_modified(
+        client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        first = client.get(url)
+        assert first.has_header("ETag") and first.has_header("Last-Modified")
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == 304, (
+            "Убедитесь, что ленты отвечают 304 Not Modified, если клиент"
+            " прислал актуальный ETag."
+        )
+        # Только дата самой свежей публикации, без запроса элементов.
+        assert len(context.captured_queries) <= 1, context.captured_queries
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert response.status_code == 304, url
+
+
+def test_feed_etag_changes_with_posts(
+        client, feed_urls, post_with_published_location
+):
+    etags = {url: client.get(url)["ETag"] for url in feed_urls}
+    post_with_published_location.title = "Новый заголовок"
+    post_with_published_location.save()
+    for url, etag in etags.items():
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, url
+        assert "Новый заголовок" in response.content.decode()
+
+
+def test_rss_and_atom_have_different_etags(client, feed_urls):
+    rss, atom = feed_urls[:2]
+    assert client.get(rss)["ETag"] != client.get(atom)["ETag"], (
+        "Убедитесь, что ETag лент RSS и Atom различаются."
+    )
+
+
+def test_feed_last_modified_does_not_go_back(
+        mixer, client, post_with_published_location
+):
+    post = post_with_published_location
+    newest = mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        location=post.location, pub_date=post.pub_date)
+    # Last-Modified точен до секунды: состарим отметки на час.
+    hour_ago = timezone.now() - timedelta(hours=1)
+    for model in (Post, Category, Location, AuthorStats):
+        model.objects.update(updated_at=hour_ago)
+    first = client.get("/feed/")
+    newest.delete()
+    response = client.get(
+        "/feed/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == 200, (
+        "Убедитесь, что после удаления свежей публикации лента не отвечает"
+        " 304 по If-Modified-Since."
+    )
+    assert parse_http_date(response["Last-Modified"]) > parse_http_date(
+        first["Last-Modified"])
@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import images
+from blog.models import ImageStatus
+
+pytestmark = [pytest.mark.django_db]
+
+ORIENTATION = 0x0112
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _rotated_jpeg(name="rotated.jpg"):
+    # Кадр 40×20, который камера пометила как повёрнутый на 90°.
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    buffer = BytesIO()
+    Image.new("RGB", (40, 20), (0, 120, 200)).save(
+        buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@pytest.fixture
+def post_with_upload(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=_rotated_jpeg())
+
+
+def test_upload_is_queued_not_processed(post_with_upload):
+    assert post_with_upload.image_status == ImageStatus.PENDING, (
+        "Убедитесь, что загруженное фото ставится в очередь обработки,"
+        " а не обрабатывается в запросе."
+    )
+    with Image.open(post_with_upload.image.path) as image:
+        assert image.size == (40, 20)
+
+
+@pytest.mark.parametrize("executor", [None, ThreadPoolExecutor])
+def test_worker_normalizes_image(post_with_upload, executor):
+    if executor is None:
+        results = images.process_pending()
+    else:
+        with executor(max_workers=2) as pool:
+            results = images.process_pending(pool)
+    assert results == {post_with_upload.pk: True}
+    post_with_upload.refresh_from_db()
+    assert post_with_upload.image_status == ImageStatus.DONE
+    with Image.open(post_with_upload.image.path) as image:
+        assert image.size == (20, 40), (
+            "Убедитесь, что воркер поворачивает фото по EXIF-ориентации."
+        )
+        assert ORIENTATION not in image.getexif(), (
+            "Убедитесь, что воркер удаляет метаданные фото."
+        )
+    assert images.process_pending() == {}
+
+
+def test_broken_image_marks_post_failed(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=SimpleUploadedFile("broken.jpg", b"not an image"))
+    assert images.process_pending() == {post.pk: False}
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.FAILED
+
+
+def test_processed_image_keeps_file_name(post_with_upload, media_root):
+    name = post_with_upload.image.name
+    assert images.process_pending() == {post_with_upload.pk: True}
+    post_with_upload.refresh_from_db()
+    assert post_with_upload.image.name == name, (
+        "Убедитесь, что обработанный файл сохраняется под прежним именем:"
+        " закешированные в других процессах страницы ссылаются на него."
+    )
+    with Image.open(media_root / name) as image:
+        assert image.size == (20, 40)
+    assert not [
+        path for path in (media_root / "posts_images").iterdir()
+        if path.name.startswith(".")
+    ], "Убедитесь, что временные файлы обработки не остаются."
+
+
+def test_failed_replace_keeps_original(
+        monkeypatch, post_with_upload, media_root):
+    def replace(source, target):
+        raise OSError("диск заполнен")
+
+    monkeypatch.setattr(images.os, "replace", replace)
+    assert images.process_pending() == {post_with_upload.pk: False}
+    with Image.open(post_with_upload.image.path) as image:
+        assert image.size == (40, 20), (
+            "Убедитесь, что сбой записи не портит оригинал."
+        )
+    assert sorted(
+        path.name for path in (media_root / "posts_images").iterdir()
+    ) == ["rotated.jpg"]
+
+
+def test_any_error_marks_post_failed(monkeypatch, post_with_upload):
+    def normalize(name):
+        raise ValueError("сбой кодека")
+
+    monkeypatch.setattr(images, "normalize", normalize)
+    assert images.process_pending() == {post_with_upload.pk: False}, (
+        "Убедитесь, что любая ошибка обработки помечает пост FAILED, а не"
+        " роняет воркер."
+    )
+    post_with_upload.refresh_from_db()
+    assert post_with_upload.image_status == ImageStatus.FAILED
+
+
+def test_command_uses_process_pool(mixer, user, published_category,
+                                   post_with_upload):
+    broken = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=SimpleUploadedFile("broken.jpg", b"not an image"))
+    call_command("process_images", workers=1, stdout=StringIO())
+    post_with_upload.refresh_from_db()
+    broken.refresh_from_db()
+    assert post_with_upload.image_status == ImageStatus.DONE
+    assert broken.image_status == ImageStatus.FAILED
+    with Image.open(post_with_upload.image.path) as image:
+        assert image.size == (20, 40), (
+            "Убедитесь, что команда обрабатывает фото в пуле процессов."
+        )
+
+
+def test_replaced_image_result_is_discarded(post_with_upload):
+    (job,) = images.claim(10)
+    post_with_upload.image = _rotated_jpeg("newer.jpg")
+    post_with_upload.save()
+    assert not images.finish(*job, ok=True)
+    post_with_upload.refresh_from_db()
+    assert post_with_upload.image_status == ImageStatus.PENDING
+
+
+def test_stale_jobs_are_requeued(post_with_upload):
+    images.claim(10)
+    assert images.claim(10) == []
+    assert images.requeue_stale() == 1
+    assert images.claim(10) == [
+        (post_with_upload.pk, post_with_upload.image.name)]
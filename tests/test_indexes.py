@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+
+from blog import views
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _view_queryset(view_cls, user, **kwargs):
+    request = RequestFactory().get("/")
+    request.user = user
+    view = view_cls()
+    view.setup(request, **kwargs)
+    return view.get_queryset()[:N_PER_PAGE]
+
+
+def _assert_uses_index(queryset, table, index_names):
+    if connection.vendor != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN есть только в SQLite")
+    plan = _query_plan(queryset)
+    steps = [step for step in plan if f" {table} " in f" {step} "]
+    assert steps, plan
+    assert any(
+        "USING" in step and "INDEX" in step
+        and any(name in step for name in index_names)
+        for step in steps
+    ), f"Запрос не использует индексы {index_names}: {plan}"
+
+
+def test_feed_uses_index(post_with_published_location):
+    _assert_uses_index(
+        _view_queryset(views.IndexListView, AnonymousUser()),
+        "blog_post",
+        ("post_feed_idx", "post_published_feed_idx"),
+    )
+
+
+def test_category_uses_index(published_category, post_with_published_location):
+    _assert_uses_index(
+        _view_queryset(
+            views.CategoryPostsListView, AnonymousUser(),
+            category_slug=published_category.slug,
+        ),
+        "blog_post",
+        ("post_category_feed_idx",),
+    )
+
+
+@pytest.mark.parametrize("as_owner", [True, False])
+def test_profile_uses_index(user, post_with_published_location, as_owner):
+    _assert_uses_index(
+        _view_queryset(
+            views.ShowProfileView,
+            user if as_owner else AnonymousUser(),
+            username=user.username,
+        ),
+        "blog_post",
+        ("post_author_feed_idx",),
+    )
+
+
+def test_comments_use_index(post_with_published_location):
+    _assert_uses_index(
+        post_with_published_location.comments.select_related("author"),
+        "blog_comment",
+        ("comment_post_created_idx",),
+    )
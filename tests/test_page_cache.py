@@ -0,0 +1,226 @@
+import socketserver
+import threading
+import time
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends import locmem
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import VERSION_KEY
+from blog.models import Comment
+from blog.page_cache import category_page_tag
+
+pytestmark = [pytest.mark.django_db]
+
+
+class _FakeRespHandler(socketserver.StreamRequestHandler):
+    """Redis-совместимая заглушка: GET/SET/MGET/DEL/EXISTS/FLUSHDB."""
+
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            if name == b"GET":
+                reply = self._bulk(store.get(args[1]))
+            elif name == b"MGET":
+                reply = b"*%d\r\n" % (len(args) - 1) + b"".join(
+                    self._bulk(store.get(key)) for key in args[1:])
+            elif name == b"SET":
+                if b"NX" in args[3:] and args[1] in store:
+                    reply = self._bulk(None)
+                else:
+                    store[args[1]] = args[2]
+                    reply = b"+OK\r\n"
+            elif name in (b"DEL", b"EXISTS"):
+                found = args[1] in store
+                if name == b"DEL":
+                    store.pop(args[1], None)
+                reply = b":%d\r\n" % found
+            elif name == b"FLUSHDB":
+                store.clear()
+                reply = b"+OK\r\n"
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(
+        ("127.0.0.1", 0), _FakeRespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["locmem", "filebased", "resp"])
+def page_cache_backend(request, tmp_path):
+    if request.param == "locmem":
+        pages = {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "pages-test",
+        }
+    elif request.param == "filebased":
+        pages = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    else:
+        pages = {
+            "BACKEND": "blog.cache_backends.RespCache",
+            "LOCATION": request.getfixturevalue("resp_server"),
+        }
+    caches_setting = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "pages": pages,
+    }
+    with override_settings(CACHES=caches_setting):
+        yield request.param
+
+
+def _urls(post):
+    return [
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ]
+
+
+def test_anonymous_hits_skip_orm(
+        page_cache_backend, unlogged_client, post_with_published_location,
+        django_assert_num_queries
+):
+    for url in _urls(post_with_published_location):
+        first = unlogged_client.get(url)
+        with django_assert_num_queries(0):
+            second = unlogged_client.get(url)
+        assert second.status_code == 200
+        assert second.content == first.content
+
+
+def test_changes_purge_affected_pages(
+        page_cache_backend, mixer, unlogged_client,
+        post_with_published_location
+):
+    post = post_with_published_location
+    for url in _urls(post):
+        unlogged_client.get(url)
+
+    mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+    index, detail, *lists = _urls(post)
+    for url in [index, *lists]:
+        content = unlogged_client.get(url).content.decode()
+        assert "Комментарии (1)" in content, url
+    assert "Свежий комментарий" in unlogged_client.get(
+        detail).content.decode()
+
+    post.category.title = "Переименованная категория"
+    post.category.save()
+    for url in _urls(post):
+        assert "Переименованная категория" in unlogged_client.get(
+            url).content.decode(), url
+
+
+def test_unrelated_pages_stay_cached(
+        mixer, unlogged_client, post_with_published_location,
+        post_of_another_author, django_assert_num_queries
+):
+    url = f"/posts/{post_of_another_author.id}/"
+    unlogged_client.get(url)
+    post_with_published_location.title = "Другой заголовок"
+    post_with_published_location.save()
+    with django_assert_num_queries(0):
+        unlogged_client.get(url)
+
+
+def test_logged_in_users_are_not_served_from_cache(
+        user_client, unlogged_client, post_with_published_location
+):
+    unlogged_client.get("/")
+    response = user_client.get("/")
+    assert response.context is not None, (
+        "Убедитесь, что авторизованным пользователям страницы не отдаются"
+        " из кеша анонимных страниц."
+    )
+
+
+def test_commenter_rename_purges_commented_posts(
+        mixer, user, unlogged_client, post_of_another_author
+):
+    mixer.blend("blog.Comment", author=user, post=post_of_another_author)
+    url = f"/posts/{post_of_another_author.id}/"
+    unlogged_client.get(url)
+    user.username = "renamed_commenter"
+    user.save()
+    assert "renamed_commenter" in unlogged_client.get(url).content.decode(), (
+        "Убедитесь, что смена имени сбрасывает страницы постов, которые"
+        " пользователь комментировал."
+    )
+
+
+
+def test_profile_header_changes_purge_profile_page(user, unlogged_client):
+    url = f"/profile/{user.username}/"
+    unlogged_client.get(url)
+    user.first_name = "Обновлённое"
+    user.save()
+    assert "Обновлённое" in unlogged_client.get(url).content.decode(), (
+        "Убедитесь, что любое сохранение пользователя сбрасывает страницу"
+        " его профиля."
+    )
+
+
+def test_comment_purge_does_not_load_author(
+        mixer, user, post_of_another_author
+):
+    comment = mixer.blend("blog.Comment", author=user,
+                          post=post_of_another_author)
+    comment = Comment.objects.get(pk=comment.pk)
+    with CaptureQueriesContext(connection) as queries:
+        comment.delete()
+    assert not [
+        query for query in queries
+        if query["sql"].startswith('SELECT "auth_user"')
+    ], "Убедитесь, что сброс страниц не загружает автора комментария."
+
+def test_unknown_slugs_do_not_leave_permanent_versions(
+        monkeypatch, unlogged_client
+):
+    assert unlogged_client.get("/category/no-such-slug/").status_code == 404
+    key = VERSION_KEY.format(category_page_tag("no-such-slug"))
+    pages = caches[settings.PAGE_CACHE_ALIAS]
+    assert pages.get(key) is not None
+    later = time.time() + settings.PAGE_CACHE_TIMEOUT + 1
+    monkeypatch.setattr(locmem.time, "time", lambda: later)
+    assert pages.get(key) is None, (
+        "Убедитесь, что версии тегов из URL создаются с таймаутом."
+    )
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from blog.paginators import encode_cursor
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def _walk_forward(client, url):
+    ids = []
+    response = client.get(url)
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        page_obj = response.context["page_obj"]
+        ids.extend(_page_ids(response))
+        if not page_obj.has_next():
+            return ids, response
+        response = client.get(url, {"after": page_obj.next_cursor})
+
+
+@pytest.mark.parametrize("url_name", ["index", "category", "profile"])
+def test_cursor_pagination_walks_all_posts(
+        user_client, user, published_category,
+        many_posts_with_published_locations, url_name
+):
+    url = {
+        "index": "/",
+        "category": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }[url_name]
+    expected = [
+        post.id for post in sorted(
+            many_posts_with_published_locations,
+            key=lambda post: (post.pub_date, post.id), reverse=True,
+        )
+    ]
+    with override_settings(PAGINATION_MODE="cursor"):
+        ids, last_response = _walk_forward(user_client, url)
+        assert ids == expected, (
+            "Убедитесь, что курсорная пагинация выдаёт все публикации"
+            " ровно по одному разу и в порядке «от новых к старым»."
+        )
+        previous = user_client.get(
+            url, {"before": last_response.context["page_obj"].previous_cursor}
+        )
+    assert _page_ids(previous) == expected[-2 * N_PER_PAGE:-N_PER_PAGE]
+
+
+def test_numbered_pages_still_work(
+        user_client, many_posts_with_published_locations
+):
+    with override_settings(PAGINATION_MODE="cursor"):
+        response = user_client.get("/", {"page": 2})
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["page_obj"].number == 2
+
+
+@pytest.mark.parametrize("token", [
+    "not-a-cursor",
+    encode_cursor([5, 5]),
+    encode_cursor([True, 1]),
+    encode_cursor(["2024-01-01T00:00:00+00:00", 10 ** 30]),
+    encode_cursor(["2024-01-01T00:00:00+00:00", "1"]),
+    encode_cursor(["2024-13-45T00:00:00+00:00", 1]),
+    encode_cursor(["2024-01-01T00:00:00", 1]),
+])
+def test_invalid_cursor_returns_404(user_client, token):
+    response = user_client.get("/", {"after": token})
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что курсор с неподходящими по типу значениями даёт 404,"
+        " а не ошибку сервера."
+    )
@@ -0,0 +1,67 @@
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _index(client):
+    return client.get("/").content.decode("utf-8")
+
+
+def test_card_is_served_from_cache(user_client, post_with_published_location):
+    post = post_with_published_location
+    assert post.title in _index(user_client)
+    # update() не вызывает сигналов: карточка должна остаться из кеша.
+    Post.objects.filter(pk=post.pk).update(title="Заголовок мимо кеша")
+    assert post.title in _index(user_client), (
+        "Убедитесь, что неизменившиеся карточки постов берутся из кеша."
+    )
+
+
+@pytest.mark.parametrize("change", ["post", "category", "location", "author"])
+def test_card_cache_invalidation(
+        user_client, post_with_published_location, change
+):
+    post = post_with_published_location
+    _index(user_client)
+    if change == "post":
+        post.title = expected = "Новый заголовок"
+        post.save()
+    elif change == "category":
+        post.category.title = expected = "Новая категория"
+        post.category.save()
+    elif change == "location":
+        post.location.name = expected = "Новое место"
+        post.location.save()
+    else:
+        post.author.username = expected = "renamed_author"
+        post.author.save()
+    assert expected in _index(user_client), (
+        "Убедитесь, что карточка поста перерисовывается после изменения"
+        " связанных с ней данных."
+    )
+
+
+def test_card_cache_follows_comment_count(
+        mixer, user_client, post_with_published_location
+):
+    _index(user_client)
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    assert "Комментарии (3)" in _index(user_client)
+
+
+def test_card_key_follows_database_not_local_versions(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    _index(user_client)
+    # Так выглядит правка из другого процесса: строка в БД изменилась,
+    # а версии в локальном кеше этого процесса никто не сбрасывал.
+    Post.objects.filter(pk=post.pk).update(
+        title="Правка из другого воркера", updated_at=timezone.now())
+    assert "Правка из другого воркера" in _index(user_client), (
+        "Убедитесь, что ключ карточки строится по updated_at из БД, а не по"
+        " версиям в кеше процесса."
+    )
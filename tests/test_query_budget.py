@@ -0,0 +1,78 @@
+import pytest
+from django.db import connections
+
+from blog import views
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_without_select_related(monkeypatch):
+    def get_queryset(self):
+        return Post.objects.filter(is_published=True).order_by("-pub_date")
+
+    monkeypatch.setattr(views.IndexListView, "get_queryset", get_queryset)
+
+
+@pytest.fixture
+def second_database(tmp_path, monkeypatch):
+    alias = "second"
+    connections.databases[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(tmp_path / "second.sqlite3"),
+    }
+    connections.ensure_defaults(alias)
+    connections.prepare_test_settings(alias)
+    original = views.IndexListView.get_context_data
+
+    def get_context_data(self, *args, **kwargs):
+        with connections[alias].cursor() as cursor:
+            for _ in range(10):
+                cursor.execute("SELECT 1")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        views.IndexListView, "get_context_data", get_context_data)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+
+
+def test_budget_catches_n_plus_one(
+        user_client, many_posts_with_published_locations,
+        feed_without_select_related
+):
+    with pytest.raises(pytest.fail.Exception) as error:
+        user_client.get("/")
+    message = str(error.value)
+    assert "blog:index" in message
+    assert 'FROM "auth_user"' in message, (
+        "Сообщение о превышении бюджета должно перечислять запросы."
+    )
+
+
+def test_budget_counts_every_database(client, second_database):
+    with pytest.raises(pytest.fail.Exception) as error:
+        client.get("/")
+    assert "[second] SELECT 1" in str(error.value), (
+        "Убедитесь, что бюджет учитывает запросы ко всем базам, а не только"
+        " к default."
+    )
+
+
+@pytest.mark.query_budget(**{"blog:index": 100})
+def test_budget_can_be_overridden(
+        user_client, many_posts_with_published_locations,
+        feed_without_select_related
+):
+    assert user_client.get("/").status_code == 200
+
+
+@pytest.mark.no_query_budget
+def test_budget_can_be_disabled(
+        user_client, many_posts_with_published_locations,
+        feed_without_select_related
+):
+    assert user_client.get("/").status_code == 200
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count_queries(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize("n_posts", [1, N_PER_PAGE, N_PER_PAGE * 3])
+def test_category_page_query_count(
+        mixer, user, user_client, published_category, published_locations,
+        n_posts
+):
+    mixer.cycle(n_posts).blend(
+        "blog.Post", author=user, category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+    url = f"/category/{published_category.slug}/"
+    user_client.get(url)
+    # Сессия и пользователь, отметка изменений страницы, категория,
+    # COUNT(*) пагинатора и посты.
+    assert _count_queries(user_client, url) == 6, (
+        "Убедитесь, что страница категории выполняет фиксированное число"
+        " SQL-запросов вне зависимости от количества постов."
+    )
+    with override_settings(PAGINATION_MODE="cursor"):
+        # В режиме курсоров COUNT(*) не нужен.
+        assert _count_queries(user_client, url) == 5
+
+
+@pytest.mark.parametrize("as_author", [True, False])
+def test_post_detail_query_count(
+        mixer, user_client, another_user_client, post_with_published_location,
+        as_author
+):
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    client = user_client if as_author else another_user_client
+    url = f"/posts/{post_with_published_location.id}/"
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    post_queries = [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "blog_post"' in query["sql"] and "MAX(" not in query["sql"]
+    ]
+    assert len(post_queries) == 1, (
+        "Убедитесь, что пост вместе с автором, категорией, местоположением"
+        " и проверкой видимости загружается одним SQL-запросом."
+    )
+    # Сессия и пользователь, отметка изменений, пост, комментарии.
+    assert len(context.captured_queries) == 5, context.captured_queries
+
+
+@pytest.mark.parametrize("as_owner", [True, False])
+def test_profile_query_count(
+        mixer, user, another_user, user_client, another_user_client,
+        published_category, as_owner
+):
+    posts = mixer.cycle(N_PER_PAGE + 2).blend(
+        "blog.Post", author=user, category=published_category)
+    mixer.cycle(3).blend("blog.Comment", author=user, post=posts[0])
+    client = user_client if as_owner else another_user_client
+    url = f"/profile/{user.username}/"
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    user_queries = [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "auth_user"' in query["sql"]
+        and f"'{user.username}'" in query["sql"]
+    ]
+    assert len(user_queries) == 1, (
+        "Убедитесь, что автор профиля загружается один раз вместе"
+        " со статистикой."
+    )
+    # Сессия и пользователь, отметка изменений, автор со статистикой,
+    # посты страницы.
+    assert len(context.captured_queries) == 5, context.captured_queries
+    assert response.context["post_count"] == N_PER_PAGE + 2
+    assert response.context["stats"].comment_count == 3
+    assert response.context["paginator"].num_pages == 2
@@ -0,0 +1,108 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+
+from blog import scheduling, stats
+from blog.models import Post
+from blog.routers import primary_reads, replica_reads
+
+REPLICA = "replica"
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    connections.databases[REPLICA] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    connections.ensure_defaults(REPLICA)
+    connections.prepare_test_settings(REPLICA)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+@pytest.mark.django_db
+def test_router_sends_reads_to_replica_until_write(
+        replica, post_with_published_location
+):
+    assert Post.objects.all().db == "default", (
+        "Убедитесь, что вне запросов чтение идёт с основной базы."
+    )
+    with replica_reads() as routing:
+        assert Post.objects.all().db == replica
+        Post.objects.filter(pk=post_with_published_location.id).update(
+            title="Новый заголовок")
+        assert routing.wrote
+        assert Post.objects.all().db == "default", (
+            "Убедитесь, что после записи запрос читает с основной базы."
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_author_reads_own_writes(
+        replica, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    call_command("sync_replicas", stdout=StringIO())
+    Post.objects.filter(pk=post.id).update(title="Ещё не на реплике")
+
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    assert post.title in response.content.decode(), (
+        "Убедитесь, что GET-запросы читают с реплики."
+    )
+    assert "primary_db" not in response.cookies
+
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Комментарий автора"})
+    assert response.cookies["primary_db"]["max-age"]
+    content = user_client.get(url).content.decode()
+    assert "Ещё не на реплике" in content, (
+        "Убедитесь, что после записи автор читает с основной базы."
+    )
+    assert "Комментарий автора" in content
+
+
+def test_request_reads_from_one_replica(settings):
+    settings.DATABASE_REPLICAS = ["replica1", "replica2", "replica3"]
+    with replica_reads():
+        aliases = {Post.objects.all().db for _ in range(20)}
+    assert len(aliases) == 1, (
+        "Убедитесь, что в одном запросе все чтения идут с одной реплики."
+    )
+
+
+@pytest.mark.django_db
+def test_reads_for_writes_use_primary(replica, post_with_published_location):
+    # У файла реплики нет таблиц: чтение с неё упало бы.
+    with replica_reads():
+        with primary_reads():
+            assert Post.objects.all().db == "default"
+        assert Post.objects.all().db == replica
+        scheduling.refresh_next_due()
+        stats.rebuild()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_cache_is_filled_from_primary(
+        replica, user_client, client, post_with_published_location
+):
+    post = post_with_published_location
+    call_command("sync_replicas", stdout=StringIO())
+    url = f"/posts/{post.id}/"
+    client.get(url)
+
+    # Комментарий сбрасывает страницу, но до реплики ещё не дошёл.
+    user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Комментарий автора"})
+    for _ in range(2):
+        content = client.get(url).content.decode()
+        assert "Комментарий автора" in content, (
+            "Убедитесь, что страница для кеша анонимов читается с основной"
+            " базы, а не с отстающей реплики."
+        )
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog import scheduling
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _feed_ids(client):
+    return [post.id for post in client.get("/").context["page_obj"]]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+# Запрос, на который пришлась публикация, ещё и обновляет счётчики
+# автора: публикацию, сброс кеша страниц и статистику.
+@pytest.mark.query_budget(**{"blog:index": 9})
+def test_post_becomes_visible_on_request(
+        monkeypatch, unlogged_client, scheduled_post
+):
+    assert not scheduled_post.is_visible
+    assert scheduled_post.id not in _feed_ids(unlogged_client)
+
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(scheduling.timezone, "now", lambda: later)
+    assert scheduled_post.id in _feed_ids(unlogged_client), (
+        "Убедитесь, что отложенная публикация появляется в ленте, когда"
+        " наступает её дата публикации."
+    )
+
+
+def test_publish_scheduled_command(scheduled_post):
+    received = []
+
+    def receiver(sender, post_ids, **kwargs):
+        received.extend(post_ids)
+
+    scheduling.post_became_visible.connect(receiver)
+    try:
+        Post.objects.filter(pk=scheduled_post.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=1))
+        call_command("publish_scheduled")
+    finally:
+        scheduling.post_became_visible.disconnect(receiver)
+    assert Post.published.filter(pk=scheduled_post.pk).exists()
+    assert received == [scheduled_post.pk]
+
+
+def test_save_recomputes_visibility(scheduled_post):
+    scheduled_post.pub_date = timezone.now() - timedelta(days=1)
+    scheduled_post.save()
+    assert Post.published.filter(pk=scheduled_post.pk).exists()
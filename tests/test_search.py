@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog import search
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=["fts5", "memory"])
+def search_backend(request, monkeypatch):
+    if request.param == "fts5" and not search.fts5_available():
+        pytest.skip("SQLite собран без FTS5")
+    index = (
+        search.SQLiteFTSIndex() if request.param == "fts5"
+        else search.MemoryIndex()
+    )
+    monkeypatch.setattr(search, "_index", index)
+    return index
+
+
+def _found_ids(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_posts_and_comments(
+        search_backend, mixer, user_client, published_category
+):
+    in_title = mixer.blend(
+        "blog.Post", title="Варим кофе", text="Просто прогулка",
+        category=published_category,
+    )
+    in_text = mixer.blend(
+        "blog.Post", title="Прогулка", text="В парке пили кофе",
+        category=published_category,
+    )
+    commented = mixer.blend(
+        "blog.Post", title="Без птиц", text="Ничего",
+        category=published_category,
+    )
+    mixer.blend("blog.Comment", post=commented, text="А где кофе?")
+    mixer.blend(
+        "blog.Post", title="Кофе", text="скрыто", is_published=False,
+        category=published_category,
+    )
+
+    found = _found_ids(user_client, "коф")
+    assert found[0] == in_title.id, (
+        "Убедитесь, что совпадение в заголовке ранжируется выше совпадения"
+        " в тексте."
+    )
+    assert set(found) == {in_title.id, in_text.id, commented.id}, (
+        "Убедитесь, что поиск находит опубликованные посты по заголовку,"
+        " тексту и комментариям и не показывает скрытые посты."
+    )
+
+
+def test_search_index_follows_changes(
+        search_backend, mixer, user_client, published_category
+):
+    post = mixer.blend(
+        "blog.Post", title="Старое название", category=published_category)
+    assert _found_ids(user_client, "старое") == [post.id]
+    post.title = "Новое название"
+    post.save()
+    assert _found_ids(user_client, "старое") == []
+    assert _found_ids(user_client, "новое") == [post.id]
+    post.delete()
+    assert _found_ids(user_client, "новое") == []
@@ -0,0 +1,92 @@
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _content(response):
+    if response.streaming:
+        return b"".join(response.streaming_content).decode()
+    return response.content.decode()
+
+
+def _locations(content):
+    return re.findall(r"<loc>http://testserver(/[^<]*)</loc>", content)
+
+
+@override_settings(SITEMAP_URLS_PER_FILE=2)
+def test_sitemap_lists_visible_pages(
+        client, mixer, user, published_category,
+        unpublished_posts_with_published_locations
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category)
+    index = client.get("/sitemap.xml")
+    assert index.status_code == 200
+    shards = _locations(_content(index))
+    post_shards = [shard for shard in shards if "-posts-" in shard]
+    assert len(post_shards) >= 2, (
+        "Убедитесь, что посты разбиты на файлы карты сайта по"
+        " SITEMAP_URLS_PER_FILE адресов."
+    )
+
+    urls = []
+    for shard in shards:
+        content = _content(client.get(shard))
+        assert content.count("<lastmod>") == content.count("<loc>")
+        urls += _locations(content)
+    assert sorted(urls) == sorted([
+        *(f"/posts/{post.pk}/" for post in posts),
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    ]), "Убедитесь, что в карте сайта только опубликованные страницы."
+
+    assert client.get("/sitemap-posts-1000.xml").status_code == 404
+    assert client.get("/sitemap-unknown-0.xml").status_code == 404
+
+
+def test_render_command_writes_files(
+        tmp_path, client, post_with_published_location
+):
+    stale = tmp_path / "sitemap-posts-99.xml"
+    stale.write_text("")
+    call_command(
+        "render_sitemaps", base_url="http://testserver/", output=tmp_path)
+    assert not stale.exists()
+    files = {path.name for path in tmp_path.iterdir()}
+    index = (tmp_path / "sitemap.xml").read_text()
+    assert {name for name in files if name != "sitemap.xml"} == {
+        path.lstrip("/") for path in _locations(index)}
+    for name in files:
+        assert (tmp_path / name).read_text() == _content(
+            client.get(f"/{name}")), name
+
+
+
+@override_settings(SITEMAP_URLS_PER_FILE=1)
+def test_index_is_cached_until_posts_change(
+        client, mixer, user, post_with_published_location
+):
+    first = _locations(_content(client.get("/sitemap.xml")))
+    with CaptureQueriesContext(connection) as context:
+        assert _locations(_content(client.get("/sitemap.xml"))) == first
+    assert not [
+        query for query in context.captured_queries
+        if "blog_post" in query["sql"]
+    ], "Убедитесь, что индекс карты сайта берётся из кеша без GROUP BY."
+
+    category = mixer.blend("blog.Category", is_published=True)
+    post = mixer.blend("blog.Post", author=user, category=category)
+    shard = f"/sitemap-posts-{post.pk}.xml"
+    assert shard in _locations(_content(client.get("/sitemap.xml"))), (
+        "Убедитесь, что новая публикация сбрасывает кеш индекса."
+    )
+    category.delete()
+    assert shard not in _locations(_content(client.get("/sitemap.xml"))), (
+        "Убедитесь, что удаление категории сбрасывает кеш индекса."
+    )
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+
+from blogicum.sqlite_backend.base import DatabaseWrapper
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def open_database(tmp_path):
+    wrappers = []
+
+    def open_database(**options):
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": str(tmp_path / "db.sqlite3"),
+            "OPTIONS": {**connection.settings_dict["OPTIONS"], **options},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=f"test{len(wrappers)}")
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield open_database
+    for wrapper in wrappers:
+        wrapper.close()
+
+
+def _pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_connections_are_tuned(open_database):
+    database = open_database()
+    assert _pragma(database, "journal_mode") == "wal", (
+        "Убедитесь, что соединения SQLite включают журнал WAL."
+    )
+    assert _pragma(database, "synchronous") == 1
+    assert _pragma(database, "temp_store") == 2
+    assert _pragma(database, "foreign_keys") == 1
+
+
+def test_locked_queries_are_retried(open_database):
+    writer = open_database()
+    with writer.cursor() as cursor:
+        cursor.execute("CREATE TABLE notes (text TEXT)")
+    writer.connection.execute("BEGIN IMMEDIATE")
+
+    impatient = open_database(timeout=0.01, lock_retries=0)
+    with pytest.raises(OperationalError, match="database is locked"):
+        with impatient.cursor() as cursor:
+            cursor.execute("INSERT INTO notes VALUES (%s)", ["первая"])
+
+    patient = open_database(
+        timeout=0.01, lock_retries=8, lock_retry_delay=0.01)
+    timer = threading.Timer(0.1, writer.connection.commit)
+    timer.start()
+    with patient.cursor() as cursor:
+        cursor.execute("INSERT INTO notes VALUES (%s)", ["вторая"])
+    timer.join()
+    assert writer.connection.execute(
+        "SELECT text FROM notes").fetchall() == [("вторая",)], (
+        "Убедитесь, что запрос, получивший «database is locked», повторяется."
+    )
+
+
+def test_unknown_transaction_mode_is_rejected(open_database):
+    database = open_database(transaction_mode="IMMEDIATELY")
+    with pytest.raises(ImproperlyConfigured, match="transaction_mode"):
+        database.ensure_connection()
+    assert database.connection is None, (
+        "Убедитесь, что transaction_mode проверяется при открытии соединения."
+    )
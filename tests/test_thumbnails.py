@@ -0,0 +1,129 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog import images, thumbnails
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.THUMBNAIL_WIDTHS = (320, 640, 1280)
+    return tmp_path
+
+
+def _upload(name, width, height=None):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height or width // 2), (200, 10, 10)).save(
+        buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@pytest.fixture
+def post_with_large_image(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=_upload("large.jpg", 1000))
+    images.process_pending()
+    post.refresh_from_db()
+    return post
+
+
+def _variant_files(media_root):
+    return sorted(
+        path.name for path in (media_root / "posts_images").iterdir()
+        if ".w" in path.name)
+
+
+def test_variants_created_by_worker(media_root, post_with_large_image):
+    formats = thumbnails.enabled_formats()
+    expected = sorted(
+        thumbnails.variant_name(post_with_large_image.image.name, width, fmt)
+        .rsplit("/", 1)[1]
+        for width in (320, 640) for fmt in formats
+    )
+    assert _variant_files(media_root) == expected, (
+        "Убедитесь, что после обработки изображения созданы уменьшенные"
+        " копии всех ширин меньше оригинала."
+    )
+    with Image.open(
+            media_root / thumbnails.variant_name(
+                post_with_large_image.image.name, 320, "jpeg")) as image:
+        assert image.size == (320, 160)
+
+
+def test_card_has_srcset(client, post_with_large_image):
+    content = client.get("/").content.decode()
+    assert "srcset=" in content and " 640w" in content, (
+        "Убедитесь, что карточка поста предлагает браузеру уменьшенные"
+        " копии изображения через srcset."
+    )
+    assert content.count("<img class=\"border-3") == 1
+
+
+def test_variants_follow_image_changes(media_root, post_with_large_image):
+    old_name = post_with_large_image.image.name
+    post_with_large_image.image = _upload("other.jpg", 700)
+    post_with_large_image.save()
+    images.process_pending()
+    post_with_large_image.refresh_from_db()
+    assert not any(
+        name.startswith("large") for name in _variant_files(media_root)), (
+        "Убедитесь, что при замене изображения старые копии удаляются."
+    )
+    assert thumbnails.variant_name(
+        post_with_large_image.image.name, 640, "jpeg"
+    ).rsplit("/", 1)[1] in _variant_files(media_root)
+    assert old_name != post_with_large_image.image.name
+
+    post_with_large_image.delete()
+    assert _variant_files(media_root) == []
+
+
+def test_variants_are_read_without_decoding(
+        monkeypatch, media_root, post_with_large_image
+):
+    name = post_with_large_image.image.name
+    (media_root / thumbnails.variant_name(name, 640, "jpeg")).unlink()
+    thumbnails.cache.delete(thumbnails.THUMBNAILS_KEY.format(name))
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("Изображение декодируется в запросе.")
+
+    monkeypatch.setattr(thumbnails.Image, "open", forbidden)
+    variants = thumbnails.get_variants(post_with_large_image.image)
+    assert [target for _, _, target in variants] == [
+        thumbnails.variant_name(name, width, fmt)
+        for width in (320, 640) for fmt in thumbnails.enabled_formats()
+        if (width, fmt) != (640, "jpeg")
+    ], (
+        "Убедитесь, что варианты берутся из уже созданных файлов, без"
+        " декодирования изображения при показе страницы."
+    )
+    assert len(_variant_files(media_root)) == len(variants)
+
+
+def test_variants_follow_exif_orientation(media_root):
+    # Файл 400×1000 с Orientation=6 показывается как 1000×400.
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (400, 1000), (10, 200, 10)).save(
+        buffer, "JPEG", exif=exif)
+    (media_root / "posts_images").mkdir()
+    (media_root / "posts_images" / "portrait.jpg").write_bytes(
+        buffer.getvalue())
+    name = "posts_images/portrait.jpg"
+    variants = thumbnails.generate(name, default_storage)
+    assert sorted({width for width, _, _ in variants}) == [320, 640], (
+        "Убедитесь, что ширины копий сравниваются с шириной изображения"
+        " после поворота по EXIF."
+    )
+    with Image.open(
+            media_root / thumbnails.variant_name(name, 640, "jpeg")) as image:
+        assert image.size == (640, 256)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post
+from blog.scheduling import publish_due_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _moment():
+    return timezone.now() - timedelta(microseconds=1)
+
+
+def test_saves_and_updates_are_tracked(
+        mixer, user, published_category
+):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    other = mixer.blend("blog.Post", author=user, category=published_category)
+    assert list(Post.objects.changed_since(post.created_at).order_by(
+        "pk")) == [post, other]
+
+    since = _moment()
+    assert not Post.objects.changed_since(since).exists()
+    post.title = "Новый заголовок"
+    post.save(update_fields=["title"])
+    assert list(Post.objects.changed_since(since)) == [post], (
+        "Убедитесь, что сохранение с update_fields обновляет updated_at."
+    )
+    assert list(Post.published.changed_since(since)) == [post]
+
+    since = _moment()
+    published_category.title = "Новое название"
+    published_category.save()
+    assert list(Category.objects.changed_since(since)) == [published_category]
+    assert not Post.objects.changed_since(since).exists()
+
+
+def test_comments_touch_their_post(
+        mixer, user, published_category
+):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    other = mixer.blend("blog.Post", author=user, category=published_category)
+    old_comment = mixer.blend("blog.Comment", post=other, author=user)
+
+    since = _moment()
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    assert list(Post.objects.changed_since(since)) == [post], (
+        "Убедитесь, что новый комментарий обновляет updated_at публикации."
+    )
+    assert list(Comment.objects.changed_since(since)) == [comment]
+
+    since = _moment()
+    old_comment.text = "Исправленный комментарий"
+    old_comment.save()
+    assert list(Post.objects.changed_since(since)) == [other]
+    assert old_comment in Comment.objects.changed_since(since)
+
+    since = _moment()
+    comment.delete()
+    assert list(Post.objects.changed_since(since)) == [post]
+
+
+def test_scheduled_publication_is_tracked(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1))
+    since = _moment()
+    publish_due_posts(now=timezone.now() + timedelta(days=2))
+    assert list(Post.objects.changed_since(since)) == [post]